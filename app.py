@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import json
+import time
 import base64
+import hashlib
+import logging
+import logging.handlers
+import queue
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
 from compliance_checker import ComplianceChecker
 from document_processor import DocumentProcessor
@@ -19,12 +24,135 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Loggers of this app's modules, logged at INFO; libraries stay at the root's WARNING
+APP_LOGGERS = (__name__, 'compliance_checker', 'compliance_frameworks', 'pii_detector')
+
+@st.cache_resource(show_spinner=False)
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Route log records through a queue so handler I/O runs on a background thread.
+    
+    Cached as a resource so reruns reuse the same listener instead of adding handlers.
+    """
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    
+    # The root keeps its default WARNING level, so library INFO records (such as
+    # httpx's line per API request) are not written for every analysis chunk
+    logging.getLogger().addHandler(logging.handlers.QueueHandler(log_queue))
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(logging.INFO)
+    return listener
+
+configure_logging()
+
+# Report files are generated off the script thread so the page stays responsive
+REPORT_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+REPORT_FUTURE_KEYS = ('pdf_report_future', 'excel_report_future')
+
+# Violation fields shown in the results table, mapped to their display names
+VIOLATION_COLUMNS = {
+    'framework': 'Framework',
+    'severity': 'Severity',
+    'type': 'Type',
+    'description': 'Description',
+    'location': 'Location'
+}
+
+# Pie slice colors for each severity level
+SEVERITY_COLORS = {
+    'High': '#ff4444',
+    'Medium': '#ffaa00',
+    'Low': '#44ff44'
+}
+
 # Initialize session state
 if 'analysis_results' not in st.session_state:
     st.session_state.analysis_results = None
+if 'violations_df' not in st.session_state:
+    st.session_state.violations_df = None
 if 'uploaded_file_name' not in st.session_state:
     st.session_state.uploaded_file_name = None
 
+@st.cache_resource
+def get_checker(frameworks: tuple, sensitivity: str, include_pii: bool,
+                include_ai_analysis: bool) -> ComplianceChecker:
+    """Build a ComplianceChecker once per configuration and reuse it across reruns."""
+    return ComplianceChecker(
+        frameworks=list(frameworks),
+        sensitivity=sensitivity,
+        include_pii=include_pii,
+        include_ai_analysis=include_ai_analysis
+    )
+
+@st.cache_data(ttl=60)
+def check_api_status(_checker: ComplianceChecker) -> bool:
+    """Check the OpenAI connection at most once a minute instead of on every rerun."""
+    return _checker.check_api_connection()
+
+@st.cache_data(show_spinner=False)
+def build_severity_pie(severity_counts: tuple) -> go.Figure:
+    """Build the severity pie chart once per set of (severity, count) pairs."""
+    fig = go.Figure(go.Pie(
+        labels=[severity for severity, _ in severity_counts],
+        values=[count for _, count in severity_counts],
+        marker_colors=[SEVERITY_COLORS.get(severity, '#888888') for severity, _ in severity_counts]
+    ))
+    fig.update_layout(title="Violations by Severity")
+    return fig
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def run_analysis(text_hash: str, _text_content: str, _checker: ComplianceChecker,
+                 frameworks: tuple, sensitivity: str, include_pii: bool,
+                 include_ai_analysis: bool) -> dict:
+    """
+    Run compliance analysis, cached by document hash and configuration.
+    
+    Underscored arguments are not hashed by Streamlit: text_hash stands in for the
+    document text, and the configuration arguments identify the checker.
+    """
+    return _checker.analyze_document(_text_content)
+
+def build_violations_table(violations: dict, frameworks: list) -> pd.DataFrame:
+    """Flatten per-framework violations into a single display table."""
+    records = [violation for framework in frameworks for violation in violations.get(framework, [])]
+    violations_df = pd.DataFrame.from_records(records, columns=list(VIOLATION_COLUMNS))
+    return violations_df.rename(columns=VIOLATION_COLUMNS)
+
+def render_report_download(future_key: str, button_label: str, generate, args: tuple,
+                           download_label: str, file_extension: str, mime: str,
+                           error_label: str) -> bool:
+    """
+    Start report generation in the background and offer the file once it is ready.
+    
+    Returns:
+        True while the report is still being generated
+    """
+    if st.button(button_label, use_container_width=True):
+        st.session_state[future_key] = REPORT_EXECUTOR.submit(generate, *args)
+    
+    future = st.session_state.get(future_key)
+    if future is None:
+        return False
+    
+    if not future.done():
+        st.info("⏳ Generating report...")
+        return True
+    
+    try:
+        st.download_button(
+            label=download_label,
+            data=future.result(),
+            file_name=f"compliance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_extension}",
+            mime=mime
+        )
+    except Exception as e:
+        st.error(f"Error generating {error_label}: {str(e)}")
+        del st.session_state[future_key]
+    
+    return False
+
 def main():
     st.title("🛡️ AI-Powered Enterprise Compliance Checker")
     st.markdown("**Detect regulatory violations across GDPR, SOC2, HIPAA, and RBI frameworks**")
@@ -52,10 +180,17 @@ def main():
         include_pii = st.checkbox("Include PII Detection", value=True)
         include_ai_analysis = st.checkbox("Include AI Analysis", value=True)
         
+        # One checker per configuration, shared by the status check and the analysis
+        checker = get_checker(
+            tuple(frameworks),
+            sensitivity_level.lower(),
+            include_pii,
+            include_ai_analysis
+        )
+        
         # API Key status
         st.subheader("System Status")
-        checker = ComplianceChecker()
-        if checker.check_api_connection():
+        if check_api_status(checker):
             st.success("✅ OpenAI API Connected")
         else:
             st.error("❌ OpenAI API Not Available")
@@ -102,17 +237,28 @@ def main():
                             st.error("No text content found in the document.")
                             return
                         
-                        # Initialize compliance checker
-                        checker = ComplianceChecker(
-                            frameworks=frameworks,
-                            sensitivity=sensitivity_level.lower(),
-                            include_pii=include_pii,
-                            include_ai_analysis=include_ai_analysis
-                        )
+                        # Perform analysis (repeat runs on the same document hit the cache)
+                        text_hash = hashlib.blake2b(
+                            text_content.encode('utf-8'), digest_size=16
+                        ).hexdigest()
+                        # Reports generated for a previous analysis are stale now
+                        for future_key in REPORT_FUTURE_KEYS:
+                            st.session_state.pop(future_key, None)
                         
-                        # Perform analysis
-                        results = checker.analyze_document(text_content)
+                        results = run_analysis(
+                            text_hash,
+                            text_content,
+                            checker,
+                            tuple(frameworks),
+                            sensitivity_level.lower(),
+                            include_pii,
+                            include_ai_analysis
+                        )
                         st.session_state.analysis_results = results
+                        # Flatten once here so reruns only read the precomputed table
+                        st.session_state.violations_df = build_violations_table(
+                            results['violations'], list(results['violations'])
+                        )
                         
                         st.success("✅ Analysis completed successfully!")
                         st.rerun()
@@ -129,7 +275,13 @@ def main():
             # Summary metrics
             st.subheader("Compliance Summary")
             
-            total_violations = sum(len(results['violations'].get(fw, [])) for fw in frameworks)
+            violations_df = st.session_state.violations_df
+            if violations_df is None:
+                violations_df = build_violations_table(results['violations'], frameworks)
+            elif set(frameworks) != set(results['violations']):
+                violations_df = violations_df[violations_df['Framework'].isin(frameworks)]
+            
+            total_violations = len(violations_df)
             total_pii = len(results.get('pii_entities', []))
             compliance_score = results.get('overall_score', 0)
             
@@ -145,34 +297,10 @@ def main():
             if total_violations > 0:
                 st.subheader("Violations by Framework")
                 
-                framework_data = []
-                for framework in frameworks:
-                    violations = results['violations'].get(framework, [])
-                    if violations:
-                        for violation in violations:
-                            framework_data.append({
-                                'Framework': framework,
-                                'Severity': violation.get('severity', 'Medium'),
-                                'Type': violation.get('type', 'Unknown'),
-                                'Description': violation.get('description', ''),
-                                'Location': violation.get('location', '')
-                            })
-                
-                if framework_data:
-                    violations_df = pd.DataFrame(framework_data)
-                    
+                if not violations_df.empty:
                     # Severity distribution chart
                     severity_counts = violations_df['Severity'].value_counts()
-                    fig = px.pie(
-                        values=severity_counts.values,
-                        names=severity_counts.index,
-                        title="Violations by Severity",
-                        color_discrete_map={
-                            'High': '#ff4444',
-                            'Medium': '#ffaa00',
-                            'Low': '#44ff44'
-                        }
-                    )
+                    fig = build_severity_pie(tuple(severity_counts.items()))
                     st.plotly_chart(fig, use_container_width=True)
                     
                     # Detailed violations table
@@ -229,43 +357,36 @@ def main():
             st.subheader("Export Report")
             col_export1, col_export2 = st.columns(2)
             
+            report_args = (results, st.session_state.uploaded_file_name, frameworks)
+            
             with col_export1:
-                if st.button("📄 Download PDF Report", use_container_width=True):
-                    try:
-                        report_gen = ReportGenerator()
-                        pdf_buffer = report_gen.generate_pdf_report(
-                            results, 
-                            st.session_state.uploaded_file_name,
-                            frameworks
-                        )
-                        
-                        st.download_button(
-                            label="⬇️ Download PDF",
-                            data=pdf_buffer,
-                            file_name=f"compliance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                            mime="application/pdf"
-                        )
-                    except Exception as e:
-                        st.error(f"Error generating PDF: {str(e)}")
+                pdf_pending = render_report_download(
+                    'pdf_report_future',
+                    "📄 Download PDF Report",
+                    ReportGenerator().generate_pdf_report,
+                    report_args,
+                    "⬇️ Download PDF",
+                    "pdf",
+                    "application/pdf",
+                    "PDF"
+                )
             
             with col_export2:
-                if st.button("📊 Download Excel Report", use_container_width=True):
-                    try:
-                        report_gen = ReportGenerator()
-                        excel_buffer = report_gen.generate_excel_report(
-                            results,
-                            st.session_state.uploaded_file_name,
-                            frameworks
-                        )
-                        
-                        st.download_button(
-                            label="⬇️ Download Excel",
-                            data=excel_buffer,
-                            file_name=f"compliance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
-                    except Exception as e:
-                        st.error(f"Error generating Excel: {str(e)}")
+                excel_pending = render_report_download(
+                    'excel_report_future',
+                    "📊 Download Excel Report",
+                    ReportGenerator().generate_excel_report,
+                    report_args,
+                    "⬇️ Download Excel",
+                    "xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    "Excel"
+                )
+            
+            # Poll until background report generation finishes
+            if pdf_pending or excel_pending:
+                time.sleep(0.5)
+                st.rerun()
         
         else:
             st.info("Upload and analyze a document to see results here.")
@@ -1,15 +1,241 @@
 import os
 import json
+import logging
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Dict, Any
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    _json_loads = json.loads
 
 from pii_detector import PIIDetector
-from compliance_frameworks import ComplianceFrameworks
+from compliance_frameworks import ComplianceFrameworks, PreparedText
 from utils import chunk_text, calculate_compliance_score
 
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _get_compliance_frameworks() -> ComplianceFrameworks:
+    """Return a shared ComplianceFrameworks instance so rule tables are built once."""
+    return ComplianceFrameworks()
+
+# Connection pool limits shared by the OpenAI clients
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+
+@lru_cache(maxsize=None)
+def _get_openai_client() -> OpenAI:
+    """Return the process-wide sync OpenAI client, reusing its pooled connections."""
+    return OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY", "default_key"),
+        http_client=httpx.Client(limits=_HTTP_LIMITS)
+    )
+
+@lru_cache(maxsize=None)
+def _get_async_openai_client() -> AsyncOpenAI:
+    """
+    Return the process-wide async OpenAI client.
+    
+    Only used from coroutines scheduled through _run_async, so its connection
+    pool is always bound to the same background event loop.
+    """
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY", "default_key"),
+        http_client=httpx.AsyncClient(limits=_HTTP_LIMITS)
+    )
+
+# Canonical severity labels for every severity name rules or the model may use
+_SEVERITY_LEVELS = {
+    'high': 'High',
+    'medium': 'Medium',
+    'low': 'Low',
+    'critical': 'High',
+    'warning': 'Medium',
+    'info': 'Low'
+}
+
+# Common casings precomputed so normalization is a single dict lookup
+_SEVERITY_MAP = {
+    variant: level
+    for name, level in _SEVERITY_LEVELS.items()
+    for variant in (name, name.upper(), name.capitalize())
+}
+
+# Function-calling schemas used to get structured output from the model
+_REPORT_VIOLATIONS_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "report_violations",
+        "description": "Report the compliance violations found in the analyzed text.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "violations": {
+                    "type": "array",
+                    "description": "Detected violations; empty if none were found",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "chunk": {"type": "integer", "description": "Number of the CHUNK the violation was found in"},
+                            "category": {"type": "string"},
+                            "type": {"type": "string", "description": "Violation type"},
+                            "description": {"type": "string"},
+                            "severity": {"type": "string", "enum": ["high", "medium", "low"]},
+                            "matched_text": {"type": "string", "description": "Relevant text excerpt"},
+                            "recommendation": {"type": "string", "description": "Remediation suggestion"},
+                            "confidence": {"type": "number"}
+                        },
+                        "required": ["chunk", "category", "type", "description", "severity"]
+                    }
+                }
+            },
+            "required": ["violations"]
+        }
+    }
+}
+
+_REPORT_ANALYSIS_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "report_analysis",
+        "description": "Report the overall compliance analysis of the document.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "summary": {"type": "string", "description": "Executive summary of compliance status"},
+                "risk_assessment": {
+                    "type": "object",
+                    "properties": {
+                        "level": {"type": "string", "enum": ["high", "medium", "low"]},
+                        "explanation": {"type": "string", "description": "Detailed risk explanation"}
+                    },
+                    "required": ["level", "explanation"]
+                },
+                "recommendations": {"type": "array", "items": {"type": "string"}},
+                "compliance_gaps": {"type": "array", "items": {"type": "string"}},
+                "strengths": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["summary", "risk_assessment", "recommendations",
+                         "compliance_gaps", "strengths"]
+        }
+    }
+}
+
+def _tool_choice(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Force the model to answer by calling the given tool."""
+    return {"type": "function", "function": {"name": tool["function"]["name"]}}
+
+def _parse_tool_arguments(response) -> Dict[str, Any]:
+    """Extract the JSON arguments of the forced tool call from a chat completion."""
+    tool_calls = response.choices[0].message.tool_calls
+    if not tool_calls:
+        raise ValueError("Model response did not include a tool call")
+    return _json_loads(tool_calls[0].function.arguments)
+
+# Character budget for the document excerpt sent with the synthesis request
+_EXCERPT_CHARS = 2000
+
+def _document_excerpt(text: str, max_chars: int = _EXCERPT_CHARS) -> str:
+    """Return the start of the document with whitespace collapsed, cut at a word boundary."""
+    # Over-read so that collapsing whitespace still leaves max_chars of content
+    excerpt = " ".join(text[:max_chars * 2].split())
+    
+    if len(excerpt) > max_chars:
+        cut = excerpt.rfind(' ', 0, max_chars)
+        excerpt = excerpt[:cut if cut > 0 else max_chars]
+    
+    return excerpt
+
+# Bump when the chunk prompt or tool schema changes so cached answers are not reused
+_CHUNK_PROMPT_VERSION = 2
+_CHUNK_BATCH_SIZE = 4
+_CHUNK_CACHE_SIZE = 1024
+_CHUNK_CACHE_TTL = 24 * 60 * 60
+
+# Raw model violations per (prompt version, framework, chunk) content hash. Only
+# touched from coroutines on the background event loop, so no locking is needed.
+_chunk_cache = OrderedDict()
+
+def _chunk_cache_key(chunk: str, framework: str) -> str:
+    """Hash a chunk together with its framework and the current prompt version."""
+    payload = f"{_CHUNK_PROMPT_VERSION}|{framework}|{chunk}".encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _get_cached_chunk(key: str):
+    """Return cached raw violations for a chunk, or None if missing or expired."""
+    entry = _chunk_cache.get(key)
+    if entry is None:
+        return None
+    
+    cached_at, raw_violations = entry
+    if time.monotonic() - cached_at > _CHUNK_CACHE_TTL:
+        del _chunk_cache[key]
+        return None
+    
+    _chunk_cache.move_to_end(key)
+    return raw_violations
+
+def _cache_chunk(key: str, raw_violations: List[Dict[str, Any]]):
+    """Store raw violations for a chunk, evicting the least recently used entries."""
+    _chunk_cache[key] = (time.monotonic(), raw_violations)
+    _chunk_cache.move_to_end(key)
+    while len(_chunk_cache) > _CHUNK_CACHE_SIZE:
+        _chunk_cache.popitem(last=False)
+
+# Rule-based violations per (document digest, framework); rules are fixed for the process
+_RULE_CACHE_SIZE = 32
+_rule_cache = OrderedDict()
+_rule_cache_lock = threading.Lock()
+
+def _get_cached_rule_violations(key: tuple):
+    """Return a copy of the cached rule violations for a document and framework, or None."""
+    with _rule_cache_lock:
+        cached = _rule_cache.get(key)
+        if cached is None:
+            return None
+        _rule_cache.move_to_end(key)
+    return [dict(violation) for violation in cached]
+
+def _cache_rule_violations(key: tuple, violations: List[Dict[str, Any]]):
+    """Store a copy of rule violations, evicting the least recently used entries."""
+    with _rule_cache_lock:
+        _rule_cache[key] = tuple(dict(violation) for violation in violations)
+        _rule_cache.move_to_end(key)
+        while len(_rule_cache) > _RULE_CACHE_SIZE:
+            _rule_cache.popitem(last=False)
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+def _run_async(coro):
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    Coroutines are executed on a single long-lived background event loop so the
+    async OpenAI client (and its connection pool) stays bound to one loop across
+    Streamlit reruns instead of a fresh loop per asyncio.run() call.
+    """
+    global _event_loop
+    
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, daemon=True).start()
+    
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop).result()
+
 class ComplianceChecker:
     def __init__(self, frameworks: List[str] = None, sensitivity: str = "medium", 
-                 include_pii: bool = True, include_ai_analysis: bool = True):
+                 include_pii: bool = True, include_ai_analysis: bool = True,
+                 max_concurrency: int = 8):
         """
         Initialize the compliance checker with specified frameworks and settings.
         
@@ -18,32 +244,29 @@ class ComplianceChecker:
             sensitivity: Detection sensitivity level (high, medium, low)
             include_pii: Whether to include PII detection
             include_ai_analysis: Whether to include AI-powered analysis
+            max_concurrency: Maximum number of concurrent OpenAI requests
         """
         self.frameworks = frameworks or ["GDPR", "SOC2", "HIPAA", "RBI"]
         self.sensitivity = sensitivity
         self.include_pii = include_pii
         self.include_ai_analysis = include_ai_analysis
+        self.max_concurrency = max_concurrency
         
-        # Initialize OpenAI client
-        self.openai_client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "default_key")
-        )
+        # Shared OpenAI clients (sync for health checks, async for analysis fan-out)
+        self.openai_client = _get_openai_client()
+        self.async_client = _get_async_openai_client()
         
         # Initialize components
         if self.include_pii:
             self.pii_detector = PIIDetector()
         
-        self.compliance_frameworks = ComplianceFrameworks()
+        self.compliance_frameworks = _get_compliance_frameworks()
         
     def check_api_connection(self) -> bool:
         """Check if OpenAI API is available and working."""
         try:
-            # Test with a minimal request
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[{"role": "user", "content": "test"}],
-                max_tokens=5
-            )
+            # Retrieving model metadata validates the key without spending tokens
+            self.openai_client.models.retrieve("gpt-4o")
             return True
         except Exception:
             return False
@@ -67,18 +290,21 @@ class ComplianceChecker:
         }
         
         try:
-            # 1. Rule-based compliance checking
+            # 1. Rule-based compliance checking (text is lowercased once for all frameworks)
+            prepared = self.compliance_frameworks.prepare(text_content)
             for framework in self.frameworks:
-                violations = self._check_framework_compliance(text_content, framework)
+                violations = self._check_framework_compliance(prepared, framework)
                 results['violations'][framework] = violations
             
             # 2. PII Detection
             if self.include_pii:
                 results['pii_entities'] = self.pii_detector.detect_pii(text_content)
             
-            # 3. AI-powered analysis
+            # 3. AI-powered analysis (all OpenAI calls fan out concurrently)
             if self.include_ai_analysis:
-                results['ai_insights'] = self._perform_ai_analysis(text_content, results['violations'])
+                results['ai_insights'] = _run_async(
+                    self._run_ai_analysis(text_content, results['violations'])
+                )
             
             # 4. Calculate overall compliance score
             results['overall_score'] = calculate_compliance_score(results)
@@ -92,72 +318,84 @@ class ComplianceChecker:
         
         return results
     
-    def _check_framework_compliance(self, text: str, framework: str) -> List[Dict[str, Any]]:
+    def _check_framework_compliance(self, prepared: PreparedText, framework: str) -> List[Dict[str, Any]]:
         """
         Check compliance against a specific framework using rule-based detection.
         
         Args:
-            text: Document text to analyze
+            prepared: Document text prepared by ComplianceFrameworks.prepare
             framework: Compliance framework to check against
             
         Returns:
             List of detected violations
         """
+        # Rule results are memoized per document, so reruns on the same text skip the scans
+        cache_key = (prepared.digest, framework)
+        cached = _get_cached_rule_violations(cache_key)
+        if cached is not None:
+            return cached
+        
         violations = []
         
         try:
             # Get framework-specific rules
             framework_rules = self.compliance_frameworks.get_framework_rules(framework)
+            present_keywords = self.compliance_frameworks.find_present_keywords(prepared, framework)
+            relevant = self.compliance_frameworks.relevant_categories(prepared, framework)
             
             # Check each rule category
             for category, rules in framework_rules.items():
-                category_violations = self._check_rule_category(text, category, rules, framework)
+                category_violations = self._check_rule_category(
+                    prepared, category, rules, framework, present_keywords,
+                    scan_patterns=(framework, category) in relevant
+                )
                 violations.extend(category_violations)
             
-            # AI-enhanced violation detection for context-aware analysis
-            if self.include_ai_analysis:
-                ai_violations = self._ai_enhanced_framework_check(text, framework)
-                violations.extend(ai_violations)
+            _cache_rule_violations(cache_key, violations)
                 
-        except Exception as e:
-            print(f"Error checking {framework} compliance: {str(e)}")
+        except Exception:
+            logger.exception("Error checking %s compliance", framework)
         
         return violations
     
-    def _check_rule_category(self, text: str, category: str, rules: Dict, framework: str) -> List[Dict[str, Any]]:
+    def _check_rule_category(self, prepared: PreparedText, category: str, rules: Dict, framework: str,
+                             present_keywords: set, scan_patterns: bool = True) -> List[Dict[str, Any]]:
         """Check specific rule category against text."""
         violations = []
         
-        # Pattern-based detection
-        patterns = rules.get('patterns', [])
+        # Pattern-based detection. Patterns are scanned separately rather than as one
+        # alternation: rules overlap (e.g. "personal.*data"), and a union would report
+        # only the first alternative for a shared span.
+        # Categories whose required words are absent from the text cannot match and are skipped.
+        patterns = rules.get('patterns', []) if scan_patterns else ()
         for pattern in patterns:
-            matches = self.compliance_frameworks.find_pattern_matches(text, pattern)
-            for match in matches:
+            matches = self.compliance_frameworks.find_pattern_matches(prepared, pattern)
+            for start, end in matches.spans():
                 violation = {
                     'framework': framework,
                     'category': category,
                     'type': pattern.get('type', 'Pattern Match'),
                     'description': pattern.get('description', 'Pattern violation detected'),
                     'severity': self._determine_severity(pattern.get('severity', 'medium')),
-                    'location': f"Position {match['start']}-{match['end']}",
-                    'matched_text': match['text'],
+                    'location': f"Position {start}-{end}",
+                    'matched_text': prepared.text[start:end],
                     'recommendation': pattern.get('recommendation', 'Review and update content')
                 }
                 violations.append(violation)
         
         # Keyword-based detection
         keywords = rules.get('required_keywords', [])
-        missing_keywords = []
-        for keyword_group in keywords:
-            if not self.compliance_frameworks.check_keyword_presence(text, keyword_group):
-                missing_keywords.append(keyword_group)
+        missing_keywords = [
+            keyword_group for keyword_group in keywords
+            if not any(keyword.lower() in present_keywords for keyword in keyword_group)
+        ]
         
         if missing_keywords:
             violation = {
                 'framework': framework,
                 'category': category,
                 'type': 'Missing Required Content',
-                'description': f'Missing required keywords/phrases: {", ".join(missing_keywords)}',
+                'description': f'Missing required keywords/phrases: {", ".join(" / ".join(group) for group in missing_keywords)}',
                 'severity': 'Medium',
                 'location': 'Document-wide',
                 'matched_text': '',
@@ -167,69 +405,149 @@ class ComplianceChecker:
         
         return violations
     
-    def _ai_enhanced_framework_check(self, text: str, framework: str) -> List[Dict[str, Any]]:
-        """Use AI to detect context-aware compliance violations."""
+    async def _run_ai_analysis(self, text: str, violations: Dict[str, List]) -> Dict[str, Any]:
+        """
+        Run AI-enhanced framework checks concurrently, then the document-level analysis.
+        
+        Every (framework, chunk) request is independent, so they are gathered under a
+        shared semaphore. The document-level analysis summarizes the final violation
+        counts, so it is issued once the framework checks have completed.
+        
+        Args:
+            text: Document text to analyze
+            violations: Rule-based violations by framework; AI violations are appended in place
+            
+        Returns:
+            AI insights dictionary
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # Chunk once; every framework analyzes the same chunks
+        chunks = chunk_text(text, max_length=3000)
+        
+        framework_violations = await asyncio.gather(
+            *(self._ai_enhanced_framework_check(chunks, framework, semaphore)
+              for framework in self.frameworks)
+        )
+        
+        for framework, ai_violations in zip(self.frameworks, framework_violations):
+            violations.setdefault(framework, []).extend(ai_violations)
+        
+        return await self._perform_ai_analysis(text, violations, semaphore)
+    
+    async def _ai_enhanced_framework_check(self, chunks: List[str], framework: str,
+                                           semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """
+        Use AI to detect context-aware compliance violations in precomputed text chunks.
+        
+        Chunks with a cached analysis are answered from the cache; the rest are sent
+        to the model in batches of _CHUNK_BATCH_SIZE to cut per-request overhead.
+        """
         violations = []
         
         try:
-            # Chunk text for processing
-            chunks = chunk_text(text, max_length=3000)
+            raw_by_chunk = {}
+            pending = []
             
-            for i, chunk in enumerate(chunks):
-                chunk_violations = self._analyze_chunk_with_ai(chunk, framework, i)
-                violations.extend(chunk_violations)
+            for chunk_index, chunk in enumerate(chunks):
+                cache_key = _chunk_cache_key(chunk, framework)
+                cached = _get_cached_chunk(cache_key)
+                if cached is None:
+                    pending.append((chunk_index, cache_key))
+                else:
+                    raw_by_chunk[chunk_index] = cached
+            
+            batches = [
+                pending[i:i + _CHUNK_BATCH_SIZE]
+                for i in range(0, len(pending), _CHUNK_BATCH_SIZE)
+            ]
+            batch_results = await asyncio.gather(
+                *(self._analyze_chunk_batch(chunks, batch, framework, semaphore)
+                  for batch in batches)
+            )
+            for batch_result in batch_results:
+                raw_by_chunk.update(batch_result)
+            
+            for chunk_index in range(len(chunks)):
+                for violation in raw_by_chunk.get(chunk_index, []):
+                    violations.append(self._build_ai_violation(violation, framework, chunk_index))
                 
-        except Exception as e:
-            print(f"Error in AI-enhanced {framework} checking: {str(e)}")
+        except Exception:
+            logger.exception("Error in AI-enhanced %s checking", framework)
         
         return violations
     
-    def _analyze_chunk_with_ai(self, chunk: str, framework: str, chunk_index: int) -> List[Dict[str, Any]]:
-        """Analyze a text chunk using AI for compliance violations."""
+    async def _analyze_chunk_batch(self, chunks: List[str], batch: List[tuple], framework: str,
+                                   semaphore: asyncio.Semaphore) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Analyze a batch of chunks in a single AI request and cache each chunk's result.
+        
+        Args:
+            chunks: All chunks of the document
+            batch: (chunk_index, cache_key) pairs to analyze together
+            framework: Compliance framework to check against
+            semaphore: Limits concurrent OpenAI requests
+            
+        Returns:
+            Raw model violations keyed by chunk index
+        """
         try:
-            prompt = self._build_compliance_prompt(chunk, framework)
+            prompt = self._build_compliance_prompt([chunks[i] for i, _ in batch], framework)
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert compliance auditor specializing in regulatory frameworks. "
-                                 "Analyze text for compliance violations and respond with structured JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1
-            )
+            async with semaphore:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an expert compliance auditor specializing in regulatory frameworks. "
+                                     "Analyze text for compliance violations and report them with the report_violations function."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    tools=[_REPORT_VIOLATIONS_TOOL],
+                    tool_choice=_tool_choice(_REPORT_VIOLATIONS_TOOL),
+                    temperature=0.1
+                )
             
-            ai_result = json.loads(response.choices[0].message.content)
-            violations = []
+            # Violations are numbered by their CHUNK position within the batch (1-based)
+            raw_by_position = [[] for _ in batch]
+            for violation in _parse_tool_arguments(response).get('violations', []):
+                position = violation.pop('chunk', 1)
+                if isinstance(position, int) and 1 <= position <= len(batch):
+                    raw_by_position[position - 1].append(violation)
             
-            for violation in ai_result.get('violations', []):
-                violations.append({
-                    'framework': framework,
-                    'category': violation.get('category', 'AI Detection'),
-                    'type': violation.get('type', 'AI-Detected Violation'),
-                    'description': violation.get('description', ''),
-                    'severity': self._determine_severity(violation.get('severity', 'medium')),
-                    'location': f"Chunk {chunk_index + 1}",
-                    'matched_text': violation.get('matched_text', ''),
-                    'recommendation': violation.get('recommendation', ''),
-                    'confidence': violation.get('confidence', 0.8)
-                })
+            results = {}
+            for (chunk_index, cache_key), raw_violations in zip(batch, raw_by_position):
+                _cache_chunk(cache_key, raw_violations)
+                results[chunk_index] = raw_violations
             
-            return violations
+            return results
             
-        except Exception as e:
-            print(f"Error in AI chunk analysis: {str(e)}")
-            return []
+        except Exception:
+            logger.exception("Error in AI chunk analysis")
+            return {}
+    
+    def _build_ai_violation(self, violation: Dict[str, Any], framework: str,
+                            chunk_index: int) -> Dict[str, Any]:
+        """Convert a raw model violation into a violation record."""
+        return {
+            'framework': framework,
+            'category': violation.get('category', 'AI Detection'),
+            'type': violation.get('type', 'AI-Detected Violation'),
+            'description': violation.get('description', ''),
+            'severity': self._determine_severity(violation.get('severity', 'medium')),
+            'location': f"Chunk {chunk_index + 1}",
+            'matched_text': violation.get('matched_text', ''),
+            'recommendation': violation.get('recommendation', ''),
+            'confidence': violation.get('confidence', 0.8)
+        }
     
-    def _build_compliance_prompt(self, text: str, framework: str) -> str:
-        """Build AI prompt for compliance checking."""
+    def _build_compliance_prompt(self, chunks: List[str], framework: str) -> str:
+        """Build AI prompt for compliance checking of one or more numbered chunks."""
         framework_descriptions = {
             'GDPR': 'EU General Data Protection Regulation - focus on data protection, consent, privacy rights, data processing lawfulness',
             'SOC2': 'SOC 2 Type II compliance - focus on security, availability, processing integrity, confidentiality, privacy controls',
@@ -238,9 +556,10 @@ class ComplianceChecker:
         }
         
         description = framework_descriptions.get(framework, f'{framework} compliance requirements')
+        text = "\n---\n".join(f"CHUNK {i}:\n{chunk}" for i, chunk in enumerate(chunks, 1))
         
         return f"""
-Analyze the following text for {framework} compliance violations.
+Analyze the following text chunks for {framework} compliance violations.
 
 Framework: {framework}
 Description: {description}
@@ -248,20 +567,8 @@ Description: {description}
 Text to analyze:
 {text}
 
-Please identify any compliance violations and respond with JSON in this format:
-{{
-    "violations": [
-        {{
-            "category": "category_name",
-            "type": "violation_type",
-            "description": "detailed_description",
-            "severity": "high|medium|low",
-            "matched_text": "relevant_text_excerpt",
-            "recommendation": "remediation_suggestion",
-            "confidence": 0.95
-        }}
-    ]
-}}
+Identify any compliance violations and report them with the report_violations function,
+giving the number of the CHUNK each violation was found in.
 
 Focus on:
 - Missing required disclosures or statements
@@ -274,7 +581,8 @@ Focus on:
 Return empty violations array if no violations found.
 """
     
-    def _perform_ai_analysis(self, text: str, violations: Dict[str, List]) -> Dict[str, Any]:
+    async def _perform_ai_analysis(self, text: str, violations: Dict[str, List],
+                                   semaphore: asyncio.Semaphore) -> Dict[str, Any]:
         """Perform comprehensive AI analysis of the document and violations."""
         try:
             # Prepare violations summary for AI context
@@ -283,46 +591,38 @@ Return empty violations array if no violations found.
             prompt = f"""
 Analyze this document for enterprise compliance and provide comprehensive insights.
 
-Document Text (first 2000 characters):
-{text[:2000]}...
+Document Text (excerpt):
+{_document_excerpt(text)}...
 
-Detected Violations Summary:
+Detected Violations Summary (framework:total/high-severity):
 {violation_summary}
 
-Please provide a comprehensive analysis in JSON format:
-{{
-    "summary": "executive summary of compliance status",
-    "risk_assessment": {{
-        "level": "high|medium|low",
-        "explanation": "detailed risk explanation"
-    }},
-    "recommendations": ["list", "of", "actionable", "recommendations"],
-    "compliance_gaps": ["list", "of", "major", "gaps"],
-    "strengths": ["list", "of", "compliance", "strengths"]
-}}
+Provide a comprehensive analysis using the report_analysis function.
 """
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a senior compliance consultant with expertise in GDPR, SOC2, HIPAA, and RBI regulations. "
-                                 "Provide actionable insights for enterprise compliance improvement."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2
-            )
+            async with semaphore:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a senior compliance consultant with expertise in GDPR, SOC2, HIPAA, and RBI regulations. "
+                                     "Provide actionable insights for enterprise compliance improvement."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    tools=[_REPORT_ANALYSIS_TOOL],
+                    tool_choice=_tool_choice(_REPORT_ANALYSIS_TOOL),
+                    temperature=0.2
+                )
             
-            return json.loads(response.choices[0].message.content)
+            return _parse_tool_arguments(response)
             
-        except Exception as e:
-            print(f"Error in AI analysis: {str(e)}")
+        except Exception:
+            logger.exception("Error in AI analysis")
             return {
                 "summary": "AI analysis unavailable",
                 "risk_assessment": {"level": "unknown", "explanation": "Analysis failed"},
@@ -338,20 +638,18 @@ Please provide a comprehensive analysis in JSON format:
         for framework, framework_violations in violations.items():
             if framework_violations:
                 violation_count = len(framework_violations)
-                high_severity = len([v for v in framework_violations if v.get('severity') == 'High'])
-                summary_parts.append(f"{framework}: {violation_count} violations ({high_severity} high severity)")
+                high_severity = sum(1 for v in framework_violations if v.get('severity') == 'High')
+                summary_parts.append(f"{framework}:{violation_count}/{high_severity}H")
         
         return "; ".join(summary_parts) if summary_parts else "No violations detected"
     
     def _determine_severity(self, severity_input: str) -> str:
         """Normalize severity levels."""
-        severity_map = {
-            'high': 'High',
-            'medium': 'Medium', 
-            'low': 'Low',
-            'critical': 'High',
-            'warning': 'Medium',
-            'info': 'Low'
-        }
+        if not isinstance(severity_input, str):
+            return 'Medium'
+        
+        severity = _SEVERITY_MAP.get(severity_input)
+        if severity is None:
+            severity = _SEVERITY_LEVELS.get(severity_input.lower(), 'Medium')
         
-        return severity_map.get(severity_input.lower(), 'Medium')
+        return severity
@@ -1,304 +1,699 @@
 import re
-from typing import Dict, List, Any
+import hashlib
+import logging
+from array import array
+from functools import cached_property, lru_cache
+from typing import Dict, List, Any, Set, Union, Iterator, Tuple, Optional
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keyword checks fall back to substring scans
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+# Flags applied to every rule pattern; patterns themselves carry no inline flags
+_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Longest gap a rule's ".*" may span, and how far past a match its exclusion is looked for
+_MAX_GAP = 200
+_BOUNDED_GAP = r'[^\n]{0,%d}' % _MAX_GAP
+
+# Escape sequences, kept as-is when lowercasing a pattern (e.g. \S must not become \s)
+_RE_ESCAPE_OR_LITERAL = re.compile(r'\\.|[^\\]+', re.DOTALL)
+
+def _bound_gaps(pattern: str) -> str:
+    """
+    Replace each ".*" token of a regex with _BOUNDED_GAP.
+    
+    Escapes and character classes are copied unchanged, so an escaped "\\.*" or a
+    ".*" inside brackets keeps its meaning. A following "?" or "+" still applies
+    to the bounded gap, keeping lazy and possessive gaps as they were.
+    """
+    parts, i = [], 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            parts.append(pattern[i:i + 2])
+            i += 2
+        elif char == '[':
+            # A ']' right after '[' or '[^' is a literal member of the class
+            end = i + 1
+            if pattern.startswith('^', end):
+                end += 1
+            if pattern.startswith(']', end):
+                end += 1
+            while end < len(pattern) and pattern[end] != ']':
+                end += 2 if pattern[end] == '\\' else 1
+            parts.append(pattern[i:end + 1])
+            i = end + 1
+        elif pattern.startswith('.*', i):
+            parts.append(_BOUNDED_GAP)
+            i += 2
+        else:
+            parts.append(char)
+            i += 1
+    return ''.join(parts)
+
+@lru_cache(maxsize=256)
+def _compile(pattern: str, flags: int = _FLAGS) -> re.Pattern:
+    """
+    Compile a rule pattern, reusing earlier compilations.
+    
+    Every ".*" is bounded to _BOUNDED_GAP so a match can only extend a limited
+    distance within its line, keeping backtracking per start position bounded.
+    """
+    return re.compile(_bound_gaps(pattern), flags)
+
+# Pattern pieces that are plain words, or a group of plain-word alternatives
+_RE_PLAIN_PIECE = re.compile(r'\(?([a-z0-9 ]+(?:\|[a-z0-9 ]+)*)\)?')
+
+def _required_literals(pattern: str) -> Tuple[Tuple[str, ...], ...]:
+    """
+    Find literal words that any match of a rule pattern must contain.
+    
+    The pattern is split on its top-level ".*" gaps; every piece that is a plain
+    word, or a group of plain-word alternatives, yields one any-of group. Pieces
+    with other regex syntax are ignored, which only makes the result less strict.
+    """
+    pieces, depth, start, i = [], 0, 0, 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and char == '|':
+            return ()  # top-level alternation: no piece is required by every match
+        elif depth == 0 and pattern.startswith('.*', i):
+            pieces.append(pattern[start:i])
+            start = i + 2
+            i += 1
+        i += 1
+    pieces.append(pattern[start:])
+    
+    required = []
+    for piece in pieces:
+        plain = _RE_PLAIN_PIECE.fullmatch(piece.lower())
+        if plain and (piece.startswith('(') == piece.endswith(')')):
+            required.append(tuple(plain.group(1).split('|')))
+    return tuple(required)
+
+def _compile_lowercase(pattern: str) -> re.Pattern:
+    """
+    Compile a case-sensitive, lowercased variant of a rule pattern.
+    
+    Searching pre-lowercased text with it finds the same spans as the IGNORECASE
+    pattern on the original text, while letting the engine scan for literal
+    prefixes instead of case-folding every character.
+    """
+    lowered = _RE_ESCAPE_OR_LITERAL.sub(
+        lambda part: part.group() if part.group().startswith('\\') else part.group().lower(),
+        pattern
+    )
+    return _compile(lowered, re.MULTILINE)
+
+class PreparedText:
+    """Document text with its lowercased form and content digest computed once."""
+    
+    __slots__ = ('text', 'text_lower', 'digest', 'present_keywords')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.text_lower = text.lower()
+        self.digest = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        self.present_keywords = None
+
+def _context_around(text: str, start: int, end: int, context_length: int = 100) -> str:
+    """Get surrounding context for a span of text."""
+    context_start = max(0, start - context_length)
+    context_end = min(len(text), end + context_length)
+    
+    context = text[context_start:context_end]
+    
+    # Add ellipsis if context is truncated; only untruncated ends can need trimming
+    if context_start > 0:
+        context = "..." + context
+    else:
+        context = context.lstrip()
+    if context_end < len(text):
+        context = context + "..."
+    else:
+        context = context.rstrip()
+    
+    return context
+
+class MatchSet:
+    """
+    Matches of one pattern, stored as parallel arrays of offsets into the text.
+    
+    Matched text and context are sliced on demand, so callers that only need
+    offsets or a few of the matches don't pay for building them all.
+    """
+    
+    __slots__ = ('text', 'starts', 'ends')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.starts = array('q')
+        self.ends = array('q')
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def add(self, start: int, end: int):
+        """Record a match span."""
+        self.starts.append(start)
+        self.ends.append(end)
+    
+    def spans(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over (start, end) offsets of the matches."""
+        return zip(self.starts, self.ends)
+    
+    def matched_text(self, i: int) -> str:
+        """Return the text of the i-th match."""
+        return self.text[self.starts[i]:self.ends[i]]
+    
+    def context(self, i: int, context_length: int = 100) -> str:
+        """Return the text surrounding the i-th match."""
+        return _context_around(self.text, self.starts[i], self.ends[i], context_length)
+
+def _lowered(text: Union[str, PreparedText]) -> str:
+    """Return the lowercased text, reusing it when text is already prepared."""
+    if isinstance(text, PreparedText):
+        return text.text_lower
+    return text.lower()
+
+@lru_cache(maxsize=1)
+def _define_gdpr_rules() -> Dict[str, Any]:
+    """Define GDPR compliance rules and patterns."""
+    return {
+        'data_protection': {
+            'required_keywords': [
+                ['data protection', 'personal data'],
+                ['lawful basis', 'legitimate interest', 'consent'],
+                ['data subject rights', 'right to erasure', 'right to rectification']
+            ],
+            'patterns': [
+                {
+                    'type': 'Missing Consent Mechanism',
+                    'pattern': r'collect.*personal.*data',
+                    'exclude': r'consent',
+                    'description': 'Personal data collection mentioned without consent mechanism',
+                    'severity': 'high',
+                    'recommendation': 'Add clear consent mechanism for personal data collection'
+                },
+                {
+                    'type': 'Vague Data Processing Purpose',
+                    'pattern': r'process.*data.*for.*business.*purposes?',
+                    'exclude': r'specific',
+                    'description': 'Data processing purpose is too vague',
+                    'severity': 'medium',
+                    'recommendation': 'Specify exact purposes for data processing'
+                },
+                {
+                    'type': 'Missing Data Retention Policy',
+                    'pattern': r'retain.*data',
+                    'exclude': r'period|time|duration',
+                    'description': 'Data retention mentioned without specific timeframe',
+                    'severity': 'medium',
+                    'recommendation': 'Specify data retention periods'
+                }
+            ]
+        },
+        'privacy_rights': {
+            'required_keywords': [
+                ['right to access', 'data portability'],
+                ['data protection officer', 'DPO'],
+                ['privacy by design', 'privacy by default']
+            ],
+            'patterns': [
+                {
+                    'type': 'Missing Subject Rights',
+                    'pattern': r'personal.*data',
+                    'exclude': r'right to access|right to erasure|right to rectification',
+                    'description': 'Personal data mentioned without subject rights',
+                    'severity': 'high',
+                    'recommendation': 'Include comprehensive data subject rights information'
+                }
+            ]
+        },
+        'international_transfers': {
+            'required_keywords': [
+                ['adequate protection', 'standard contractual clauses'],
+                ['third country', 'international transfer']
+            ],
+            'patterns': [
+                {
+                    'type': 'Unprotected International Transfer',
+                    'pattern': r'(transfer|share|send).*data.*(outside|abroad|international)',
+                    'exclude': r'adequate|protection|safeguards',
+                    'description': 'International data transfer without adequate protection',
+                    'severity': 'high',
+                    'recommendation': 'Implement adequate safeguards for international transfers'
+                }
+            ]
+        }
+    }
+
+@lru_cache(maxsize=1)
+def _define_soc2_rules() -> Dict[str, Any]:
+    """Define SOC 2 compliance rules and patterns."""
+    return {
+        'security': {
+            'required_keywords': [
+                ['access controls', 'authentication'],
+                ['encryption', 'data encryption'],
+                ['vulnerability management', 'security monitoring']
+            ],
+            'patterns': [
+                {
+                    'type': 'Weak Access Control',
+                    'pattern': r'access.*system',
+                    'exclude': r'authentication|authorization|multi-factor',
+                    'description': 'System access mentioned without proper controls',
+                    'severity': 'high',
+                    'recommendation': 'Implement strong authentication and authorization controls'
+                },
+                {
+                    'type': 'Unencrypted Data Storage',
+                    'pattern': r'store.*data',
+                    'exclude': r'encrypt',
+                    'description': 'Data storage mentioned without encryption',
+                    'severity': 'high',
+                    'recommendation': 'Implement encryption for data at rest'
+                }
+            ]
+        },
+        'availability': {
+            'required_keywords': [
+                ['backup', 'disaster recovery'],
+                ['business continuity', 'redundancy'],
+                ['uptime', 'service level agreement']
+            ],
+            'patterns': [
+                {
+                    'type': 'Missing Backup Strategy',
+                    'pattern': r'critical.*data',
+                    'exclude': r'backup|recovery',
+                    'description': 'Critical data mentioned without backup strategy',
+                    'severity': 'medium',
+                    'recommendation': 'Implement comprehensive backup and recovery procedures'
+                }
+            ]
+        },
+        'processing_integrity': {
+            'required_keywords': [
+                ['data validation', 'input validation'],
+                ['error handling', 'exception handling'],
+                ['audit trail', 'logging']
+            ],
+            'patterns': [
+                {
+                    'type': 'Missing Input Validation',
+                    'pattern': r'user.*input',
+                    'exclude': r'validat|sanitiz|check',
+                    'description': 'User input processing without validation',
+                    'severity': 'high',
+                    'recommendation': 'Implement comprehensive input validation'
+                }
+            ]
+        }
+    }
+
+@lru_cache(maxsize=1)
+def _define_hipaa_rules() -> Dict[str, Any]:
+    """Define HIPAA compliance rules and patterns."""
+    return {
+        'protected_health_information': {
+            'required_keywords': [
+                ['protected health information', 'PHI'],
+                ['covered entity', 'business associate'],
+                ['minimum necessary', 'administrative safeguards']
+            ],
+            'patterns': [
+                {
+                    'type': 'Unsecured PHI',
+                    'pattern': r'(health.*information|medical.*record|PHI)',
+                    'exclude': r'encrypt|secure|protect',
+                    'description': 'Health information mentioned without security measures',
+                    'severity': 'high',
+                    'recommendation': 'Implement encryption and access controls for PHI'
+                },
+                {
+                    'type': 'Missing Business Associate Agreement',
+                    'pattern': r'(share|disclose|provide).*health.*information.*vendor',
+                    'exclude': r'agreement',
+                    'description': 'PHI sharing with vendors without BAA',
+                    'severity': 'high',
+                    'recommendation': 'Ensure Business Associate Agreements are in place'
+                }
+            ]
+        },
+        'access_controls': {
+            'required_keywords': [
+                ['role-based access', 'access controls'],
+                ['audit logs', 'access monitoring'],
+                ['user authentication', 'password policy']
+            ],
+            'patterns': [
+                {
+                    'type': 'Weak PHI Access Control',
+                    'pattern': r'access.*PHI',
+                    'exclude': r'role|permission|authorization',
+                    'description': 'PHI access without proper role-based controls',
+                    'severity': 'high',
+                    'recommendation': 'Implement role-based access controls for PHI'
+                }
+            ]
+        },
+        'breach_notification': {
+            'required_keywords': [
+                ['breach notification', 'incident response'],
+                ['72 hours', 'breach assessment'],
+                ['HHS notification', 'patient notification']
+            ],
+            'patterns': [
+                {
+                    'type': 'Missing Breach Procedures',
+                    'pattern': r'security.*incident',
+                    'exclude': r'notification|report|procedure',
+                    'description': 'Security incidents mentioned without notification procedures',
+                    'severity': 'medium',
+                    'recommendation': 'Establish clear breach notification procedures'
+                }
+            ]
+        }
+    }
+
+@lru_cache(maxsize=1)
+def _define_rbi_rules() -> Dict[str, Any]:
+    """Define RBI (Reserve Bank of India) compliance rules and patterns."""
+    return {
+        'data_localization': {
+            'required_keywords': [
+                ['data localization', 'India storage'],
+                ['payment data', 'financial data'],
+                ['local storage', 'domestic storage']
+            ],
+            'patterns': [
+                {
+                    'type': 'Non-compliant Data Storage',
+                    'pattern': r'(payment|financial).*data.*stor',
+                    'exclude': r'India',
+                    'description': 'Payment/financial data storage location not specified as India',
+                    'severity': 'high',
+                    'recommendation': 'Ensure payment and financial data is stored within India'
+                },
+                {
+                    'type': 'Cross-border Data Transfer',
+                    'pattern': r'(transfer|send).*payment.*data.*(overseas|abroad|foreign)',
+                    'description': 'Cross-border transfer of payment data',
+                    'severity': 'high',
+                    'recommendation': 'Comply with RBI data localization requirements'
+                }
+            ]
+        },
+        'cybersecurity': {
+            'required_keywords': [
+                ['cybersecurity framework', 'cyber resilience'],
+                ['incident response', 'cyber incident'],
+                ['risk assessment', 'vulnerability assessment']
+            ],
+            'patterns': [
+                {
+                    'type': 'Missing Cybersecurity Framework',
+                    'pattern': r'financial.*system',
+                    'exclude': r'cybersecurity|security.*framework',
+                    'description': 'Financial systems without cybersecurity framework',
+                    'severity': 'high',
+                    'recommendation': 'Implement comprehensive cybersecurity framework as per RBI guidelines'
+                }
+            ]
+        },
+        'kyc_aml': {
+            'required_keywords': [
+                ['know your customer', 'KYC'],
+                ['anti-money laundering', 'AML'],
+                ['customer due diligence', 'CDD']
+            ],
+            'patterns': [
+                {
+                    'type': 'Inadequate KYC Process',
+                    'pattern': r'customer.*onboard',
+                    'exclude': r'KYC|identity.*verification|due.*diligence',
+                    'description': 'Customer onboarding without proper KYC procedures',
+                    'severity': 'high',
+                    'recommendation': 'Implement comprehensive KYC and AML procedures'
+                }
+            ]
+        }
+    }
 
 class ComplianceFrameworks:
     """Define compliance rules and patterns for different regulatory frameworks."""
     
     def __init__(self):
-        self.frameworks = {
-            'GDPR': self._define_gdpr_rules(),
-            'SOC2': self._define_soc2_rules(),
-            'HIPAA': self._define_hipaa_rules(),
-            'RBI': self._define_rbi_rules()
+        # Frameworks are compiled on first use, so single-framework checks skip the rest
+        self._builders = {
+            'GDPR': _define_gdpr_rules,
+            'SOC2': _define_soc2_rules,
+            'HIPAA': _define_hipaa_rules,
+            'RBI': _define_rbi_rules
         }
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._keyword_index: Dict[str, tuple] = {}
     
-    def get_framework_rules(self, framework: str) -> Dict[str, Any]:
-        """Get rules for a specific compliance framework."""
-        return self.frameworks.get(framework, {})
-    
-    def _define_gdpr_rules(self) -> Dict[str, Any]:
-        """Define GDPR compliance rules and patterns."""
-        return {
-            'data_protection': {
-                'required_keywords': [
-                    ['data protection', 'personal data'],
-                    ['lawful basis', 'legitimate interest', 'consent'],
-                    ['data subject rights', 'right to erasure', 'right to rectification']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Missing Consent Mechanism',
-                        'pattern': r'(?i)collect.*personal.*data(?!.*consent)',
-                        'description': 'Personal data collection mentioned without consent mechanism',
-                        'severity': 'high',
-                        'recommendation': 'Add clear consent mechanism for personal data collection'
-                    },
-                    {
-                        'type': 'Vague Data Processing Purpose',
-                        'pattern': r'(?i)process.*data.*for.*business.*purposes?(?!.*specific)',
-                        'description': 'Data processing purpose is too vague',
-                        'severity': 'medium',
-                        'recommendation': 'Specify exact purposes for data processing'
-                    },
-                    {
-                        'type': 'Missing Data Retention Policy',
-                        'pattern': r'(?i)retain.*data(?!.*(period|time|duration))',
-                        'description': 'Data retention mentioned without specific timeframe',
-                        'severity': 'medium',
-                        'recommendation': 'Specify data retention periods'
-                    }
-                ]
-            },
-            'privacy_rights': {
-                'required_keywords': [
-                    ['right to access', 'data portability'],
-                    ['data protection officer', 'DPO'],
-                    ['privacy by design', 'privacy by default']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Missing Subject Rights',
-                        'pattern': r'(?i)personal.*data(?!.*(right to access|right to erasure|right to rectification))',
-                        'description': 'Personal data mentioned without subject rights',
-                        'severity': 'high',
-                        'recommendation': 'Include comprehensive data subject rights information'
-                    }
-                ]
-            },
-            'international_transfers': {
-                'required_keywords': [
-                    ['adequate protection', 'standard contractual clauses'],
-                    ['third country', 'international transfer']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Unprotected International Transfer',
-                        'pattern': r'(?i)(transfer|share|send).*data.*(outside|abroad|international)(?!.*(adequate|protection|safeguards))',
-                        'description': 'International data transfer without adequate protection',
-                        'severity': 'high',
-                        'recommendation': 'Implement adequate safeguards for international transfers'
-                    }
-                ]
-            }
-        }
+    @property
+    def frameworks(self) -> Dict[str, Dict[str, Any]]:
+        """Rules of every framework, compiling any not used yet."""
+        return {framework: self.get_framework_rules(framework) for framework in self._builders}
     
-    def _define_soc2_rules(self) -> Dict[str, Any]:
-        """Define SOC 2 compliance rules and patterns."""
-        return {
-            'security': {
-                'required_keywords': [
-                    ['access controls', 'authentication'],
-                    ['encryption', 'data encryption'],
-                    ['vulnerability management', 'security monitoring']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Weak Access Control',
-                        'pattern': r'(?i)access.*system(?!.*(authentication|authorization|multi-factor))',
-                        'description': 'System access mentioned without proper controls',
-                        'severity': 'high',
-                        'recommendation': 'Implement strong authentication and authorization controls'
-                    },
-                    {
-                        'type': 'Unencrypted Data Storage',
-                        'pattern': r'(?i)store.*data(?!.*encrypt)',
-                        'description': 'Data storage mentioned without encryption',
-                        'severity': 'high',
-                        'recommendation': 'Implement encryption for data at rest'
-                    }
-                ]
-            },
-            'availability': {
-                'required_keywords': [
-                    ['backup', 'disaster recovery'],
-                    ['business continuity', 'redundancy'],
-                    ['uptime', 'service level agreement']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Missing Backup Strategy',
-                        'pattern': r'(?i)critical.*data(?!.*(backup|recovery))',
-                        'description': 'Critical data mentioned without backup strategy',
-                        'severity': 'medium',
-                        'recommendation': 'Implement comprehensive backup and recovery procedures'
-                    }
-                ]
-            },
-            'processing_integrity': {
-                'required_keywords': [
-                    ['data validation', 'input validation'],
-                    ['error handling', 'exception handling'],
-                    ['audit trail', 'logging']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Missing Input Validation',
-                        'pattern': r'(?i)user.*input(?!.*(validat|sanitiz|check))',
-                        'description': 'User input processing without validation',
-                        'severity': 'high',
-                        'recommendation': 'Implement comprehensive input validation'
-                    }
-                ]
-            }
-        }
+    def _compile_framework(self, framework_rules: Dict[str, Any]) -> Dict[str, Any]:
+        """Compile a framework's patterns and freeze its rule lists in place."""
+        for rules in framework_rules.values():
+            # The cached rule tables are shared by every instance, so lists become tuples
+            rules['patterns'] = tuple(rules.get('patterns', ()))
+            rules['required_keywords'] = tuple(
+                tuple(keyword_group) for keyword_group in rules.get('required_keywords', ())
+            )
+            
+            # Compile every rule pattern once so scans don't re-parse pattern strings
+            for pattern_info in rules['patterns']:
+                pattern_info['compiled'] = _compile(pattern_info['pattern'])
+                pattern_info['compiled_lower'] = _compile_lowercase(pattern_info['pattern'])
+                pattern_info['required_literals'] = _required_literals(pattern_info['pattern'])
+                if 'exclude' in pattern_info:
+                    pattern_info['exclude_compiled'] = _compile(pattern_info['exclude'])
+                    pattern_info['exclude_compiled_lower'] = _compile_lowercase(pattern_info['exclude'])
+        return framework_rules
     
-    def _define_hipaa_rules(self) -> Dict[str, Any]:
-        """Define HIPAA compliance rules and patterns."""
-        return {
-            'protected_health_information': {
-                'required_keywords': [
-                    ['protected health information', 'PHI'],
-                    ['covered entity', 'business associate'],
-                    ['minimum necessary', 'administrative safeguards']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Unsecured PHI',
-                        'pattern': r'(?i)(health.*information|medical.*record|PHI)(?!.*(encrypt|secure|protect))',
-                        'description': 'Health information mentioned without security measures',
-                        'severity': 'high',
-                        'recommendation': 'Implement encryption and access controls for PHI'
-                    },
-                    {
-                        'type': 'Missing Business Associate Agreement',
-                        'pattern': r'(?i)(share|disclose|provide).*health.*information.*vendor(?!.*agreement)',
-                        'description': 'PHI sharing with vendors without BAA',
-                        'severity': 'high',
-                        'recommendation': 'Ensure Business Associate Agreements are in place'
-                    }
-                ]
-            },
-            'access_controls': {
-                'required_keywords': [
-                    ['role-based access', 'access controls'],
-                    ['audit logs', 'access monitoring'],
-                    ['user authentication', 'password policy']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Weak PHI Access Control',
-                        'pattern': r'(?i)access.*PHI(?!.*(role|permission|authorization))',
-                        'description': 'PHI access without proper role-based controls',
-                        'severity': 'high',
-                        'recommendation': 'Implement role-based access controls for PHI'
-                    }
-                ]
-            },
-            'breach_notification': {
-                'required_keywords': [
-                    ['breach notification', 'incident response'],
-                    ['72 hours', 'breach assessment'],
-                    ['HHS notification', 'patient notification']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Missing Breach Procedures',
-                        'pattern': r'(?i)security.*incident(?!.*(notification|report|procedure))',
-                        'description': 'Security incidents mentioned without notification procedures',
-                        'severity': 'medium',
-                        'recommendation': 'Establish clear breach notification procedures'
-                    }
-                ]
-            }
-        }
+    def _framework_keywords(self, framework: str) -> tuple:
+        """Return a framework's distinct required keywords, lowercased once."""
+        keywords = self._keyword_index.get(framework)
+        if keywords is None:
+            builder = self._builders.get(framework)
+            framework_rules = builder() if builder is not None else {}
+            keywords = tuple(sorted({
+                keyword.lower()
+                for rules in framework_rules.values()
+                for keyword_group in rules.get('required_keywords', ())
+                for keyword in keyword_group
+            }))
+            self._keyword_index[framework] = keywords
+        return keywords
     
-    def _define_rbi_rules(self) -> Dict[str, Any]:
-        """Define RBI (Reserve Bank of India) compliance rules and patterns."""
-        return {
-            'data_localization': {
-                'required_keywords': [
-                    ['data localization', 'India storage'],
-                    ['payment data', 'financial data'],
-                    ['local storage', 'domestic storage']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Non-compliant Data Storage',
-                        'pattern': r'(?i)(payment|financial).*data.*stor.*(?!.*India)',
-                        'description': 'Payment/financial data storage location not specified as India',
-                        'severity': 'high',
-                        'recommendation': 'Ensure payment and financial data is stored within India'
-                    },
-                    {
-                        'type': 'Cross-border Data Transfer',
-                        'pattern': r'(?i)(transfer|send).*payment.*data.*(overseas|abroad|foreign)',
-                        'description': 'Cross-border transfer of payment data',
-                        'severity': 'high',
-                        'recommendation': 'Comply with RBI data localization requirements'
-                    }
-                ]
-            },
-            'cybersecurity': {
-                'required_keywords': [
-                    ['cybersecurity framework', 'cyber resilience'],
-                    ['incident response', 'cyber incident'],
-                    ['risk assessment', 'vulnerability assessment']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Missing Cybersecurity Framework',
-                        'pattern': r'(?i)financial.*system(?!.*(cybersecurity|security.*framework))',
-                        'description': 'Financial systems without cybersecurity framework',
-                        'severity': 'high',
-                        'recommendation': 'Implement comprehensive cybersecurity framework as per RBI guidelines'
-                    }
-                ]
-            },
-            'kyc_aml': {
-                'required_keywords': [
-                    ['know your customer', 'KYC'],
-                    ['anti-money laundering', 'AML'],
-                    ['customer due diligence', 'CDD']
-                ],
-                'patterns': [
-                    {
-                        'type': 'Inadequate KYC Process',
-                        'pattern': r'(?i)customer.*onboard(?!.*(KYC|identity.*verification|due.*diligence))',
-                        'description': 'Customer onboarding without proper KYC procedures',
-                        'severity': 'high',
-                        'recommendation': 'Implement comprehensive KYC and AML procedures'
-                    }
-                ]
-            }
-        }
+    @cached_property
+    def _keyword_automaton(self):
+        """One Aho-Corasick automaton over every framework's keywords, if available."""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for framework in self._builders:
+            for keyword in self._framework_keywords(framework):
+                automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
     
-    def find_pattern_matches(self, text: str, pattern_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Find all matches for a specific pattern in text."""
-        matches = []
+    def get_framework_rules(self, framework: str) -> Dict[str, Any]:
+        """Get rules for a specific compliance framework, compiling them on first use."""
+        framework_rules = self._cache.get(framework)
+        if framework_rules is None:
+            builder = self._builders.get(framework)
+            if builder is None:
+                return {}
+            framework_rules = self._cache[framework] = self._compile_framework(builder())
+        return framework_rules
+    
+    def find_pattern_matches(self, text: Union[str, PreparedText],
+                             pattern_info: Dict[str, Any]) -> MatchSet:
+        """
+        Find all matches for a specific pattern in text.
+        
+        A match is dropped when the pattern's 'exclude' regex occurs on the same line
+        within _MAX_GAP characters after it, and the search resumes one character
+        after the rejected match start. This works like a trailing negative lookahead
+        without re-running it at every backtracking position.
+        
+        Prepared text is searched in its lowercased form with case-sensitive
+        patterns, which is several times faster than IGNORECASE matching. Offsets
+        are the same in both forms, so matched text and context come from the
+        original text.
+        
+        Args:
+            text: Text to search, raw or from prepare()
+            pattern_info: Rule pattern with 'pattern' and optional 'exclude' regexes
+            
+        Returns:
+            MatchSet of match offsets into the original text
+        """
         pattern = pattern_info['pattern']
+        original = text.text if isinstance(text, PreparedText) else text
+        matches = MatchSet(original)
+        
+        # Lowercasing only keeps offsets aligned when it doesn't change the length
+        if (isinstance(text, PreparedText) and 'compiled_lower' in pattern_info
+                and len(text.text_lower) == len(original)):
+            search_text = text.text_lower
+            compiled = pattern_info['compiled_lower']
+            exclude = pattern_info.get('exclude_compiled_lower')
+        else:
+            search_text = original
+            compiled = pattern_info.get('compiled')
+            exclude = pattern_info.get('exclude_compiled')
         
         try:
-            for match in re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE):
-                matches.append({
-                    'text': match.group(),
-                    'start': match.start(),
-                    'end': match.end(),
-                    'context': self._get_context(text, match.start(), match.end())
-                })
+            if compiled is None:
+                compiled = _compile(pattern)
+            if exclude is None and 'exclude' in pattern_info:
+                exclude = _compile(pattern_info['exclude'])
+            
+            pos = 0
+            while True:
+                match = compiled.search(search_text, pos)
+                if match is None:
+                    break
+                
+                if exclude is not None:
+                    window_end = min(len(search_text), match.end() + _MAX_GAP)
+                    line_end = search_text.find('\n', match.end(), window_end)
+                    if line_end == -1:
+                        line_end = window_end
+                    if exclude.search(search_text, match.end(), line_end):
+                        pos = match.start() + 1
+                        continue
+                
+                pos = match.end()
+                matches.add(match.start(), match.end())
         except re.error as e:
-            print(f"Regex error for pattern {pattern}: {str(e)}")
+            logger.error("Regex error for pattern %s: %s", pattern, e)
         
         return matches
     
-    def check_keyword_presence(self, text: str, keywords: List[str]) -> bool:
-        """Check if any of the required keywords are present in text."""
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in keywords)
+    def relevant_categories(self, text: Union[str, PreparedText],
+                            framework: Optional[str] = None) -> Set[Tuple[str, str]]:
+        """
+        Find rule categories whose patterns could match text.
+        
+        A pattern can only match if every one of its required literal words (or one
+        of each group of alternatives) occurs in the text. Categories where no pattern
+        passes this cheap check can skip their regex scans without losing matches.
+        
+        Args:
+            text: Text to check, raw or from prepare()
+            framework: Restrict the result to one framework; all frameworks when omitted
+            
+        Returns:
+            Set of (framework, category) pairs worth scanning
+        """
+        text_lower = _lowered(text)
+        frameworks = [framework] if framework is not None else list(self._builders)
+        
+        relevant = set()
+        for framework_name in frameworks:
+            for category, rules in self.get_framework_rules(framework_name).items():
+                for pattern_info in rules.get('patterns', ()):
+                    required = pattern_info.get('required_literals', ())
+                    if all(any(word in text_lower for word in group) for group in required):
+                        relevant.add((framework_name, category))
+                        break
+        return relevant
     
-    def _get_context(self, text: str, start: int, end: int, context_length: int = 100) -> str:
-        """Get surrounding context for a match."""
-        context_start = max(0, start - context_length)
-        context_end = min(len(text), end + context_length)
+    def prepare(self, text: str) -> PreparedText:
+        """
+        Prepare document text for repeated keyword checks.
+        
+        Args:
+            text: Document text
+            
+        Returns:
+            PreparedText to pass to find_present_keywords or check_keyword_presence
+        """
+        return PreparedText(text)
+    
+    def scan_keywords(self, text: Union[str, PreparedText]) -> Set[str]:
+        """
+        Find which keywords of any framework appear in text.
+        
+        Uses a single Aho-Corasick pass when pyahocorasick is installed. The result
+        is remembered on a PreparedText, so later frameworks reuse the same scan.
+        
+        Args:
+            text: Text to search, raw or from prepare()
+            
+        Returns:
+            Set of lowercased keywords found in text
+        """
+        if isinstance(text, PreparedText) and text.present_keywords is not None:
+            return text.present_keywords
         
-        context = text[context_start:context_end]
+        text_lower = _lowered(text)
+        if self._keyword_automaton is not None:
+            found = {keyword for _, keyword in self._keyword_automaton.iter(text_lower)}
+        else:
+            found = {
+                keyword for framework in self._builders
+                for keyword in self._framework_keywords(framework) if keyword in text_lower
+            }
+        
+        if isinstance(text, PreparedText):
+            text.present_keywords = found
+        return found
+    
+    def find_present_keywords(self, text: Union[str, PreparedText], framework: str) -> Set[str]:
+        """
+        Find which of a framework's required keywords appear in text.
         
-        # Add ellipsis if context is truncated
-        if context_start > 0:
-            context = "..." + context
-        if context_end < len(text):
-            context = context + "..."
+        Each distinct keyword is searched for once, so callers can resolve every
+        keyword group of the framework with set lookups instead of rescanning text.
         
-        return context.strip()
+        Args:
+            text: Text to search, raw or from prepare()
+            framework: Compliance framework whose keywords to look for
+            
+        Returns:
+            Set of lowercased keywords found in text
+        """
+        keywords = self._framework_keywords(framework)
+        if self._keyword_automaton is not None:
+            found = self.scan_keywords(text)
+            return {keyword for keyword in keywords if keyword in found}
+        
+        text_lower = _lowered(text)
+        return {keyword for keyword in keywords if keyword in text_lower}
+    
+    def check_keyword_presence(self, text: Union[str, PreparedText], keywords: List[str]) -> bool:
+        """Check if any of the required keywords are present in text (raw or prepared)."""
+        text_lower = _lowered(text)
+        return any(keyword.lower() in text_lower for keyword in keywords)
+    
+    def _get_context(self, text: str, start: int, end: int, context_length: int = 100) -> str:
+        """Get surrounding context for a match."""
+        return _context_around(text, start, end, context_length)
     
     def get_framework_description(self, framework: str) -> str:
         """Get description of a compliance framework."""
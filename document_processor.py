@@ -1,22 +1,118 @@
 import io
+import multiprocessing
+import os
 import re
-from typing import Optional
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, Iterator, List
 import PyPDF2
 import pdfplumber
 from docx import Document
 
+try:
+    import charset_normalizer
+except ImportError:  # installed alongside requests; without it non-UTF-8 text is read as cp1252
+    charset_normalizer = None
+
+# C0/C1 control characters other than tab, newline and carriage return, deleted by str.translate
+_CTRL_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), *range(0x7f, 0xa0)])
+
+# Curly quotes mapped to their ASCII equivalents
+_QUOTE_TABLE = str.maketrans({'\u201c': '"', '\u201d': '"', '\u2018': "'", '\u2019': "'"})
+
+_RE_BLANK_LINES = re.compile(r'\n\s*\n')
+
+# Lines that open a common document section
+_RE_SECTION_START = re.compile(
+    r'^(privacy policy|privacy statement|terms of service|terms and conditions|'
+    r'data protection|data handling|security policy|cybersecurity|compliance|regulatory)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# All-caps header lines; a section runs up to the next one
+_RE_HEADER_LINE = re.compile(r'^[A-Z][A-Z \t]+$', re.MULTILINE)
+
+# Bytes of a non-UTF-8 text file inspected when guessing its encoding
+_ENCODING_SNIFF_BYTES = 64 * 1024
+
+# PDFs with fewer pages than this are extracted in-process; worker startup would dominate
+_PARALLEL_PDF_MIN_PAGES = 4
+
+# PyPDF2 output with fewer characters per page than this is retried with pdfplumber
+_SPARSE_PDF_CHARS_PER_PAGE = 50
+
+# Seconds to wait for one worker's run of pages before extracting in-process instead
+_PDF_WORKER_TIMEOUT = 300
+
+@lru_cache(maxsize=None)
+def _get_pdf_page_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared process pool used for parallel PDF page extraction.
+    
+    Workers are started from a fork server (or spawned where there is none) rather
+    than forked from the app, whose server threads could leave a forked child
+    holding a lock that is never released.
+    """
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=os.cpu_count(),
+                               mp_context=multiprocessing.get_context(start_method))
+
+def _discard_pdf_page_pool():
+    """Shut down the shared page pool so the next parallel extraction starts a fresh one."""
+    if _get_pdf_page_pool.cache_info().currsize:
+        _get_pdf_page_pool().shutdown(wait=False, cancel_futures=True)
+    _get_pdf_page_pool.cache_clear()
+
+def _extract_pdf_page_texts(pdf_bytes: bytes, page_numbers: List[int]) -> List[str]:
+    """Extract the text of the given pages with pdfplumber in a worker process."""
+    texts = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page_number in page_numbers:
+            page = pdf.pages[page_number]
+            texts.append(page.extract_text() or "")
+            page.flush_cache()
+    return texts
+
+def _view_file_bytes(uploaded_file) -> memoryview:
+    """Return the file's contents as a memoryview, without copying in-memory uploads."""
+    getbuffer = getattr(uploaded_file, 'getbuffer', None)
+    if getbuffer is not None:
+        return getbuffer()
+    uploaded_file.seek(0)
+    return memoryview(uploaded_file.read())
+
+def _guess_encoding(raw: memoryview) -> str:
+    """Guess the encoding of non-UTF-8 text from its first _ENCODING_SNIFF_BYTES bytes."""
+    if charset_normalizer is None:
+        return 'cp1252'
+    
+    results = charset_normalizer.from_bytes(bytes(raw[:_ENCODING_SNIFF_BYTES]))
+    best = results.best()
+    if best is None:
+        return 'cp1252'
+    
+    # Single-byte Western text often scores the same under several code pages; prefer cp1252
+    for match in results:
+        tied = (match.chaos, match.coherence) == (best.chaos, best.coherence)
+        if tied and 'cp1252' in match.could_be_from_charset:
+            return 'cp1252'
+    return best.encoding
+
 class DocumentProcessor:
     """Handle processing of various document formats."""
     
     def __init__(self):
         self.supported_formats = ['pdf', 'docx', 'txt']
     
-    def process_file(self, uploaded_file) -> str:
+    def process_file(self, uploaded_file, fast_only: bool = False) -> str:
         """
         Process uploaded file and extract text content.
         
         Args:
             uploaded_file: Streamlit uploaded file object
+            fast_only: For PDFs, accept PyPDF2's text without the slower pdfplumber retry
             
         Returns:
             Extracted text content
@@ -24,7 +120,7 @@ class DocumentProcessor:
         file_extension = self._get_file_extension(uploaded_file.name)
         
         if file_extension == 'pdf':
-            return self._process_pdf(uploaded_file)
+            return self._process_pdf(uploaded_file, fast_only=fast_only)
         elif file_extension == 'docx':
             return self._process_docx(uploaded_file)
         elif file_extension == 'txt':
@@ -36,51 +132,119 @@ class DocumentProcessor:
         """Extract file extension from filename."""
         return filename.lower().split('.')[-1] if '.' in filename else ''
     
-    def _process_pdf(self, uploaded_file) -> str:
-        """Extract text from PDF file."""
-        text_content = ""
+    def _process_pdf(self, uploaded_file, fast_only: bool = False) -> str:
+        """
+        Extract text from PDF file.
         
+        PyPDF2 is tried first since decoding content streams is much faster than
+        pdfplumber's layout analysis and is enough for most born-digital PDFs.
+        pdfplumber is only run on the pages where PyPDF2's text is sparse.
+        """
         try:
-            # First try with pdfplumber (better for complex layouts)
-            with pdfplumber.open(uploaded_file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content += page_text + "\n"
+            pdf_reader = PyPDF2.PdfReader(uploaded_file)
+            page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
             
-            # If pdfplumber didn't extract much text, try PyPDF2
-            if len(text_content.strip()) < 100:
+            # Retry pages with little text using pdfplumber (better for complex layouts)
+            sparse_pages = [
+                page_number for page_number, page_text in enumerate(page_texts)
+                if len(page_text.strip()) < _SPARSE_PDF_CHARS_PER_PAGE
+            ]
+            if sparse_pages and not fast_only:
                 uploaded_file.seek(0)  # Reset file pointer
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text_content += page.extract_text() + "\n"
+                plumber_texts = self.extract_pdf_pages(uploaded_file, sparse_pages)
+                for page_number, plumber_text in zip(sparse_pages, plumber_texts):
+                    if len(plumber_text.strip()) > len(page_texts[page_number].strip()):
+                        page_texts[page_number] = plumber_text
+            
+            text_content = "\n".join(page_text for page_text in page_texts if page_text)
         
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
         
         return self._clean_text(text_content)
     
+    def extract_pdf_pages(self, uploaded_file, page_numbers: Optional[List[int]] = None) -> List[str]:
+        """
+        Extract the text of PDF pages, using worker processes for larger page counts.
+        
+        Each worker opens its own view of the PDF bytes and extracts one contiguous
+        run of the requested pages, so the document is shipped to a worker once
+        rather than per page.
+        
+        Args:
+            uploaded_file: File-like object containing PDF data
+            page_numbers: Zero-based pages to extract; all pages when omitted
+            
+        Returns:
+            Page texts in the order requested (empty string for pages without text)
+        """
+        start_position = uploaded_file.tell()
+        if page_numbers is None:
+            with pdfplumber.open(uploaded_file) as pdf:
+                page_numbers = list(range(len(pdf.pages)))
+            uploaded_file.seek(start_position)
+        
+        # Extract in-process straight from the file object; the PDF is only copied
+        # into bytes when it has to be shipped to worker processes
+        workers = min(os.cpu_count() or 1, len(page_numbers))
+        if len(page_numbers) < _PARALLEL_PDF_MIN_PAGES or workers < 2:
+            return list(self.iter_pdf_pages(uploaded_file, page_numbers))
+        
+        pdf_bytes = uploaded_file.read()
+        pages_per_worker = -(-len(page_numbers) // workers)
+        try:
+            pool = _get_pdf_page_pool()
+            futures = [
+                pool.submit(_extract_pdf_page_texts, pdf_bytes,
+                            page_numbers[start:start + pages_per_worker])
+                for start in range(0, len(page_numbers), pages_per_worker)
+            ]
+            return [
+                page_text for future in futures
+                for page_text in future.result(timeout=_PDF_WORKER_TIMEOUT)
+            ]
+        except (BrokenProcessPool, OSError):
+            # Workers unavailable, crashed or stuck (TimeoutError is an OSError); a broken
+            # pool is replaced on the next document, and this one is extracted in-process
+            _discard_pdf_page_pool()
+            return list(self.iter_pdf_pages(io.BytesIO(pdf_bytes), page_numbers))
+    
+    def iter_pdf_pages(self, uploaded_file, page_numbers: Optional[List[int]] = None) -> Iterator[str]:
+        """
+        Yield the text of each PDF page using pdfplumber.
+        
+        pdfplumber caches parsed layout objects on every page it has visited, so each
+        page's cache is flushed once its text is extracted. Memory then stays bounded
+        by a single page rather than growing with the whole document.
+        
+        Args:
+            uploaded_file: File-like object containing PDF data
+            page_numbers: Zero-based pages to extract; all pages when omitted
+            
+        Returns:
+            Iterator over page texts (empty string for pages without text)
+        """
+        with pdfplumber.open(uploaded_file) as pdf:
+            pages = pdf.pages if page_numbers is None else [pdf.pages[i] for i in page_numbers]
+            for page in pages:
+                page_text = page.extract_text() or ""
+                page.flush_cache()
+                yield page_text
+    
     def _process_docx(self, uploaded_file) -> str:
         """Extract text from Word document."""
         try:
             doc = Document(uploaded_file)
             
-            text_content = ""
-            
             # Extract text from paragraphs
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
+            lines = [paragraph.text for paragraph in doc.paragraphs]
             
-            # Extract text from tables
+            # Extract text from tables, one line per row
             for table in doc.tables:
                 for row in table.rows:
-                    for cell in row.cells:
-                        text_content += cell.text + " "
-                    text_content += "\n"
+                    lines.append(" ".join(cell.text for cell in row.cells))
             
-            return self._clean_text(text_content)
+            return self._clean_text("\n".join(lines))
             
         except Exception as e:
             raise Exception(f"Error processing Word document: {str(e)}")
@@ -88,20 +252,15 @@ class DocumentProcessor:
     def _process_txt(self, uploaded_file) -> str:
         """Process plain text file."""
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
+            # Decode straight from the upload's buffer; releasing the view afterwards
+            # leaves the file object resizable again
+            with _view_file_bytes(uploaded_file) as raw:
                 try:
-                    uploaded_file.seek(0)
-                    content = uploaded_file.read().decode(encoding)
-                    return self._clean_text(content)
+                    content = str(raw, 'utf-8')
                 except UnicodeDecodeError:
-                    continue
+                    # Guess the encoding from a prefix and decode the whole file once
+                    content = str(raw, _guess_encoding(raw), 'replace')
             
-            # If all encodings fail, use utf-8 with error handling
-            uploaded_file.seek(0)
-            content = uploaded_file.read().decode('utf-8', errors='ignore')
             return self._clean_text(content)
             
         except Exception as e:
@@ -112,19 +271,25 @@ class DocumentProcessor:
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # Multiple newlines to double newlines
-        text = re.sub(r'[ \t]+', ' ', text)       # Multiple spaces/tabs to single space
-        
         # Remove special characters that might interfere with analysis
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        text = text.translate(_CTRL_TABLE)
+        
+        # Remove excessive whitespace
+        text = _RE_BLANK_LINES.sub('\n\n', text)  # Multiple newlines to double newlines
+        text = self._collapse_spaces(text)         # Multiple spaces/tabs to single space
         
         # Normalize quotes
-        text = text.replace('"', '"').replace('"', '"')
-        text = text.replace(''', "'").replace(''', "'")
+        text = text.translate(_QUOTE_TABLE)
         
         return text.strip()
     
+    def _collapse_spaces(self, text: str) -> str:
+        """Collapse runs of spaces and tabs to one space using C-level str.replace passes."""
+        text = text.replace('\t', ' ')
+        while '  ' in text:
+            text = text.replace('  ', ' ')
+        return text
+    
     def get_document_stats(self, text: str) -> dict:
         """Get basic statistics about the document."""
         words = len(text.split())
@@ -140,22 +305,26 @@ class DocumentProcessor:
         }
     
     def extract_sections(self, text: str) -> dict:
-        """Extract common document sections based on headers."""
+        """
+        Extract common document sections based on headers.
+        
+        Header lines are located in one pass and section starts in another; each
+        section then ends at the first header line after it, found by bisection.
+        
+        Args:
+            text: Document text
+            
+        Returns:
+            Dictionary mapping section names (e.g. 'privacy_policy') to section text
+        """
         sections = {}
+        header_starts = [match.start() for match in _RE_HEADER_LINE.finditer(text)]
         
-        # Common section patterns
-        section_patterns = [
-            r'(?i)^(privacy policy|privacy statement).*?(?=^[A-Z][A-Z\s]+$|\Z)',
-            r'(?i)^(terms of service|terms and conditions).*?(?=^[A-Z][A-Z\s]+$|\Z)',
-            r'(?i)^(data protection|data handling).*?(?=^[A-Z][A-Z\s]+$|\Z)',
-            r'(?i)^(security policy|cybersecurity).*?(?=^[A-Z][A-Z\s]+$|\Z)',
-            r'(?i)^(compliance|regulatory).*?(?=^[A-Z][A-Z\s]+$|\Z)'
-        ]
-        
-        for pattern in section_patterns:
-            matches = re.finditer(pattern, text, re.MULTILINE | re.DOTALL)
-            for match in matches:
-                section_name = match.group(1).lower().replace(' ', '_')
-                sections[section_name] = match.group(0).strip()
+        for match in _RE_SECTION_START.finditer(text):
+            next_header = bisect_right(header_starts, match.start())
+            end = header_starts[next_header] if next_header < len(header_starts) else len(text)
+            
+            section_name = match.group(1).lower().replace(' ', '_')
+            sections[section_name] = text[match.start():end].strip()
         
         return sections
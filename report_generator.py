@@ -1,10 +1,49 @@
-import pandas as pd
+import xlsxwriter
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
 import json
-from io import BytesIO
+import textwrap
+from io import BytesIO, StringIO
 import base64
 
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont, TTFError
+    from reportlab.pdfgen import canvas
+except ImportError:  # reportlab is optional; PDF reports are then delivered as plain text
+    canvas = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+# PDF report layout, in points
+_PDF_FONT = 'Courier'
+_PDF_FONT_SIZE = 9
+_PDF_LEADING = 11
+_PDF_MARGIN = 50
+
+# Monospaced TrueType font with wide Unicode coverage, looked up on reportlab's font search path
+_PDF_UNICODE_FONT = ('DejaVuSansMono', 'DejaVuSansMono.ttf')
+
+@lru_cache(maxsize=None)
+def _get_pdf_font() -> Tuple[str, frozenset]:
+    """Return the PDF report font and the characters it can draw, registering it once."""
+    name, filename = _PDF_UNICODE_FONT
+    try:
+        pdfmetrics.registerFont(TTFont(name, filename))
+    except TTFError:
+        # Courier is built into every PDF reader but only covers WinAnsi (cp1252) characters
+        return _PDF_FONT, frozenset(bytes(range(256)).decode('cp1252', 'ignore'))
+    return name, frozenset(map(chr, pdfmetrics.getFont(name).face.charToGlyph))
+
+# Header cell style, matching the one pandas applies in DataFrame.to_excel
+_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
 class ReportGenerator:
     """Generate compliance reports in various formats."""
     
@@ -15,246 +54,299 @@ class ReportGenerator:
                           frameworks: List[str]) -> bytes:
         """
         Generate PDF compliance report.
-        Note: This is a simplified implementation. In production, you'd use libraries like reportlab.
+        
+        The text report is drawn line by line onto reportlab canvas pages, which
+        avoids building a Platypus document tree in memory. Without reportlab
+        installed, or when the report holds characters the PDF font cannot draw
+        (such as Devanagari or CJK violation context), the text report is
+        returned as UTF-8 bytes instead so no text is lost.
         """
         try:
-            # For this implementation, we'll create a text-based report
-            # In production, you would use reportlab or similar for proper PDF generation
+            aggregate = self._aggregate(results, frameworks)
+            report_content = self._generate_text_report(results, filename, frameworks, aggregate)
             
-            report_content = self._generate_text_report(results, filename, frameworks)
+            if canvas is None:
+                return report_content.encode('utf-8')
             
-            # Convert to bytes (in reality, this would be a proper PDF)
-            return report_content.encode('utf-8')
+            font, drawable = _get_pdf_font()
+            if not set(report_content).difference('\n\t') <= drawable:
+                return report_content.encode('utf-8')
+            
+            return self._render_pdf(report_content, filename, font)
             
         except Exception as e:
             raise Exception(f"Error generating PDF report: {str(e)}")
     
+    def _render_pdf(self, report_content: str, filename: str, font: str) -> bytes:
+        """Draw report text onto letter pages in a monospaced font, wrapping long lines."""
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=letter)
+        pdf.setTitle(f"Compliance Report - {filename}")
+        
+        width, height = letter
+        line_chars = int((width - 2 * _PDF_MARGIN) // pdf.stringWidth(' ', font, _PDF_FONT_SIZE))
+        top = height - _PDF_MARGIN
+        y = top
+        pdf.setFont(font, _PDF_FONT_SIZE)
+        
+        for line in report_content.split('\n'):
+            for segment in textwrap.wrap(line, line_chars, drop_whitespace=False) or ['']:
+                if y < _PDF_MARGIN:
+                    # The font is reset on every new page
+                    pdf.showPage()
+                    pdf.setFont(font, _PDF_FONT_SIZE)
+                    y = top
+                
+                pdf.drawString(_PDF_MARGIN, y, segment)
+                y -= _PDF_LEADING
+        
+        pdf.save()
+        return buffer.getvalue()
+    
     def generate_excel_report(self, results: Dict[str, Any], filename: str,
                             frameworks: List[str]) -> bytes:
-        """Generate Excel compliance report with multiple sheets."""
+        """
+        Generate Excel compliance report with multiple sheets.
+        
+        Rows are streamed straight to xlsxwriter in constant_memory mode, which
+        flushes each row once the next one starts instead of holding the workbook
+        in memory. Sheets are written one after another, top to bottom, as that
+        mode requires.
+        """
         try:
             buffer = BytesIO()
             
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                # Summary sheet
-                summary_data = self._prepare_summary_data(results, filename, frameworks)
-                summary_df = pd.DataFrame([summary_data])
-                summary_df.to_excel(writer, sheet_name='Summary', index=False)
-                
-                # Violations sheet
-                violations_data = self._prepare_violations_data(results, frameworks)
-                if violations_data:
-                    violations_df = pd.DataFrame(violations_data)
-                    violations_df.to_excel(writer, sheet_name='Violations', index=False)
-                
-                # PII Detection sheet
-                if results.get('pii_entities'):
-                    pii_data = self._prepare_pii_data(results['pii_entities'])
-                    pii_df = pd.DataFrame(pii_data)
-                    pii_df.to_excel(writer, sheet_name='PII_Detection', index=False)
-                
-                # Recommendations sheet
-                if results.get('ai_insights', {}).get('recommendations'):
-                    rec_data = self._prepare_recommendations_data(results['ai_insights'])
-                    rec_df = pd.DataFrame(rec_data)
-                    rec_df.to_excel(writer, sheet_name='Recommendations', index=False)
+            workbook = xlsxwriter.Workbook(
+                buffer, {'constant_memory': True, 'strings_to_urls': False}
+            )
+            header_format = workbook.add_format(_HEADER_FORMAT)
+            aggregate = self._aggregate(results, frameworks)
+            
+            # Summary sheet
+            summary_data = self._prepare_summary_data(results, filename, frameworks, aggregate)
+            self._write_sheet(workbook, 'Summary', [summary_data], header_format)
+            
+            # Violations sheet
+            violations_data = aggregate['violation_rows']
+            if violations_data:
+                self._write_sheet(workbook, 'Violations', violations_data, header_format)
+            
+            # PII Detection sheet
+            if results.get('pii_entities'):
+                pii_data = self._prepare_pii_data(results['pii_entities'])
+                self._write_sheet(workbook, 'PII_Detection', pii_data, header_format)
+            
+            # Recommendations sheet
+            if results.get('ai_insights', {}).get('recommendations'):
+                rec_data = self._prepare_recommendations_data(results['ai_insights'])
+                self._write_sheet(workbook, 'Recommendations', rec_data, header_format)
             
-            buffer.seek(0)
+            workbook.close()
             return buffer.getvalue()
             
         except Exception as e:
             raise Exception(f"Error generating Excel report: {str(e)}")
     
+    def _write_sheet(self, workbook, sheet_name: str, records: List[Dict[str, Any]],
+                     header_format):
+        """Write records to a new worksheet row by row, with their keys as the header."""
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, list(records[0]), header_format)
+        
+        for row, record in enumerate(records, 1):
+            worksheet.write_row(row, 0, list(record.values()))
+    
+    def _aggregate(self, results: Dict[str, Any], frameworks: List[str]) -> Dict[str, Any]:
+        """
+        Walk every framework's violations once, collecting the figures reports share.
+        
+        Args:
+            results: Analysis results
+            frameworks: Frameworks to report on, in report order
+            
+        Returns:
+            Dictionary with the total and high-severity violation counts, the
+            violation count per framework, and one Excel row per violation
+        """
+        framework_counts = {}
+        high_severity = 0
+        violation_rows = []
+        
+        for framework in frameworks:
+            violations = results['violations'].get(framework, [])
+            framework_counts[framework] = len(violations)
+            
+            for violation in violations:
+                severity = violation.get('severity', 'Medium')
+                if severity == 'High':
+                    high_severity += 1
+                
+                violation_rows.append({
+                    'Framework': framework,
+                    'Category': violation.get('category', 'Unknown'),
+                    'Type': violation.get('type', 'Unknown'),
+                    'Severity': severity,
+                    'Description': violation.get('description', ''),
+                    'Location': violation.get('location', ''),
+                    'Matched_Text': violation.get('matched_text', ''),
+                    'Recommendation': violation.get('recommendation', ''),
+                    'Confidence': violation.get('confidence', '')
+                })
+        
+        return {
+            'total_violations': len(violation_rows),
+            'high_severity': high_severity,
+            'framework_counts': framework_counts,
+            'violation_rows': violation_rows
+        }
+    
     def _generate_text_report(self, results: Dict[str, Any], filename: str,
-                            frameworks: List[str]) -> str:
-        """Generate a comprehensive text-based report."""
+                            frameworks: List[str], aggregate: Dict[str, Any]) -> str:
+        """Generate a comprehensive text-based report, written into one StringIO buffer."""
         
-        report_lines = []
+        buffer = StringIO()
+        write = buffer.write
         
         # Header
-        report_lines.extend([
-            "=" * 80,
-            "AI-POWERED ENTERPRISE COMPLIANCE ANALYSIS REPORT",
-            "=" * 80,
-            "",
-            f"Document: {filename}",
-            f"Analysis Date: {self.report_timestamp.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"Frameworks Analyzed: {', '.join(frameworks)}",
-            f"Overall Compliance Score: {results.get('overall_score', 0)}%",
-            "",
-        ])
+        write(
+            f"{'=' * 80}\n"
+            "AI-POWERED ENTERPRISE COMPLIANCE ANALYSIS REPORT\n"
+            f"{'=' * 80}\n"
+            "\n"
+            f"Document: {filename}\n"
+            f"Analysis Date: {self.report_timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"Frameworks Analyzed: {', '.join(frameworks)}\n"
+            f"Overall Compliance Score: {results.get('overall_score', 0)}%\n"
+            "\n"
+        )
         
         # Executive Summary
-        report_lines.extend([
-            "EXECUTIVE SUMMARY",
-            "-" * 50,
-            ""
-        ])
-        
-        total_violations = sum(len(results['violations'].get(fw, [])) for fw in frameworks)
+        total_violations = aggregate['total_violations']
         total_pii = len(results.get('pii_entities', []))
         
-        report_lines.extend([
-            f"Total Violations Detected: {total_violations}",
-            f"PII Entities Found: {total_pii}",
-            f"Compliance Score: {results.get('overall_score', 0)}%",
-            ""
-        ])
+        write(
+            "EXECUTIVE SUMMARY\n"
+            f"{'-' * 50}\n"
+            "\n"
+            f"Total Violations Detected: {total_violations}\n"
+            f"PII Entities Found: {total_pii}\n"
+            f"Compliance Score: {results.get('overall_score', 0)}%\n"
+            "\n"
+        )
         
         # Risk Assessment
         if results.get('ai_insights', {}).get('risk_assessment'):
             risk = results['ai_insights']['risk_assessment']
-            report_lines.extend([
-                "RISK ASSESSMENT",
-                "-" * 50,
-                f"Risk Level: {risk.get('level', 'Unknown').upper()}",
-                f"Explanation: {risk.get('explanation', 'No explanation available')}",
-                ""
-            ])
+            write(
+                "RISK ASSESSMENT\n"
+                f"{'-' * 50}\n"
+                f"Risk Level: {risk.get('level', 'Unknown').upper()}\n"
+                f"Explanation: {risk.get('explanation', 'No explanation available')}\n"
+                "\n"
+            )
         
         # Violations by Framework
-        report_lines.extend([
-            "VIOLATIONS BY FRAMEWORK",
-            "-" * 50,
-            ""
-        ])
+        write(
+            "VIOLATIONS BY FRAMEWORK\n"
+            f"{'-' * 50}\n"
+            "\n"
+        )
         
         for framework in frameworks:
             violations = results['violations'].get(framework, [])
-            report_lines.append(f"{framework}: {len(violations)} violations")
+            write(f"{framework}: {aggregate['framework_counts'][framework]} violations\n")
             
             if violations:
                 for i, violation in enumerate(violations, 1):
-                    report_lines.extend([
-                        f"  {i}. {violation.get('type', 'Unknown')} [{violation.get('severity', 'Medium')}]",
-                        f"     Description: {violation.get('description', 'No description')}",
-                        f"     Location: {violation.get('location', 'Unknown')}",
-                        f"     Recommendation: {violation.get('recommendation', 'No recommendation')}",
-                        ""
-                    ])
+                    write(
+                        f"  {i}. {violation.get('type', 'Unknown')} [{violation.get('severity', 'Medium')}]\n"
+                        f"     Description: {violation.get('description', 'No description')}\n"
+                        f"     Location: {violation.get('location', 'Unknown')}\n"
+                        f"     Recommendation: {violation.get('recommendation', 'No recommendation')}\n"
+                        "\n"
+                    )
             else:
-                report_lines.append("     No violations detected")
+                write("     No violations detected\n")
             
-            report_lines.append("")
+            write("\n")
         
         # PII Detection Results
         if results.get('pii_entities'):
-            report_lines.extend([
-                "PII DETECTION RESULTS",
-                "-" * 50,
-                ""
-            ])
+            write(
+                "PII DETECTION RESULTS\n"
+                f"{'-' * 50}\n"
+                "\n"
+            )
             
-            pii_by_type = {}
+            pii_by_type = defaultdict(list)
             for entity in results['pii_entities']:
-                entity_type = entity.get('label', 'Unknown')
-                if entity_type not in pii_by_type:
-                    pii_by_type[entity_type] = []
-                pii_by_type[entity_type].append(entity)
+                pii_by_type[entity.get('label', 'Unknown')].append(entity)
             
             for pii_type, entities in pii_by_type.items():
-                report_lines.append(f"{pii_type}: {len(entities)} instances")
+                write(f"{pii_type}: {len(entities)} instances\n")
                 for entity in entities:
                     confidence = entity.get('confidence', 0)
-                    report_lines.append(f"  - '{entity.get('text', '')}' (Confidence: {confidence:.2f})")
-                report_lines.append("")
+                    write(f"  - '{entity.get('text', '')}' (Confidence: {confidence:.2f})\n")
+                write("\n")
         
         # AI Insights
         if results.get('ai_insights'):
             insights = results['ai_insights']
             
-            report_lines.extend([
-                "AI ANALYSIS INSIGHTS",
-                "-" * 50,
-                ""
-            ])
+            write(
+                "AI ANALYSIS INSIGHTS\n"
+                f"{'-' * 50}\n"
+                "\n"
+            )
             
             if insights.get('summary'):
-                report_lines.extend([
-                    "Summary:",
-                    insights['summary'],
-                    ""
-                ])
+                write(f"Summary:\n{insights['summary']}\n\n")
             
             if insights.get('recommendations'):
-                report_lines.extend([
-                    "Recommendations:",
-                ])
+                write("Recommendations:\n")
                 for i, rec in enumerate(insights['recommendations'], 1):
-                    report_lines.append(f"{i}. {rec}")
-                report_lines.append("")
+                    write(f"{i}. {rec}\n")
+                write("\n")
             
             if insights.get('compliance_gaps'):
-                report_lines.extend([
-                    "Major Compliance Gaps:",
-                ])
+                write("Major Compliance Gaps:\n")
                 for gap in insights['compliance_gaps']:
-                    report_lines.append(f"• {gap}")
-                report_lines.append("")
+                    write(f"• {gap}\n")
+                write("\n")
             
             if insights.get('strengths'):
-                report_lines.extend([
-                    "Compliance Strengths:",
-                ])
+                write("Compliance Strengths:\n")
                 for strength in insights['strengths']:
-                    report_lines.append(f"• {strength}")
-                report_lines.append("")
+                    write(f"• {strength}\n")
+                write("\n")
         
         # Footer
-        report_lines.extend([
-            "=" * 80,
-            "End of Report",
-            f"Generated by AI-Powered Enterprise Compliance Checker",
-            f"Report ID: {self.report_timestamp.strftime('%Y%m%d_%H%M%S')}",
-            "=" * 80
-        ])
+        write(
+            f"{'=' * 80}\n"
+            "End of Report\n"
+            "Generated by AI-Powered Enterprise Compliance Checker\n"
+            f"Report ID: {self.report_timestamp.strftime('%Y%m%d_%H%M%S')}\n"
+            f"{'=' * 80}"
+        )
         
-        return "\n".join(report_lines)
+        return buffer.getvalue()
     
     def _prepare_summary_data(self, results: Dict[str, Any], filename: str,
-                            frameworks: List[str]) -> Dict[str, Any]:
+                            frameworks: List[str], aggregate: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare summary data for Excel report."""
-        total_violations = sum(len(results['violations'].get(fw, [])) for fw in frameworks)
         total_pii = len(results.get('pii_entities', []))
         
-        high_severity = sum(
-            len([v for v in results['violations'].get(fw, []) if v.get('severity') == 'High'])
-            for fw in frameworks
-        )
-        
         return {
             'Document_Name': filename,
             'Analysis_Date': self.report_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
             'Frameworks_Analyzed': ', '.join(frameworks),
-            'Total_Violations': total_violations,
-            'High_Severity_Violations': high_severity,
+            'Total_Violations': aggregate['total_violations'],
+            'High_Severity_Violations': aggregate['high_severity'],
             'PII_Entities_Found': total_pii,
             'Overall_Compliance_Score': results.get('overall_score', 0),
             'Risk_Level': results.get('ai_insights', {}).get('risk_assessment', {}).get('level', 'Unknown')
         }
     
-    def _prepare_violations_data(self, results: Dict[str, Any],
-                               frameworks: List[str]) -> List[Dict[str, Any]]:
-        """Prepare violations data for Excel report."""
-        violations_data = []
-        
-        for framework in frameworks:
-            violations = results['violations'].get(framework, [])
-            for violation in violations:
-                violations_data.append({
-                    'Framework': framework,
-                    'Category': violation.get('category', 'Unknown'),
-                    'Type': violation.get('type', 'Unknown'),
-                    'Severity': violation.get('severity', 'Medium'),
-                    'Description': violation.get('description', ''),
-                    'Location': violation.get('location', ''),
-                    'Matched_Text': violation.get('matched_text', ''),
-                    'Recommendation': violation.get('recommendation', ''),
-                    'Confidence': violation.get('confidence', '')
-                })
-        
-        return violations_data
-    
     def _prepare_pii_data(self, pii_entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Prepare PII data for Excel report."""
         pii_data = []
@@ -307,4 +399,10 @@ class ReportGenerator:
             'results': results
         }
         
+        if orjson is not None:
+            # Encoded in C; non-string keys are stringified as json.dumps would
+            return orjson.dumps(
+                export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode('utf-8')
+        
         return json.dumps(export_data, indent=2, ensure_ascii=False)
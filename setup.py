@@ -1,4 +1,22 @@
-from setuptools import setup, find_packages
+import sys
+from setuptools import setup, find_packages, Extension
+
+try:
+    from Cython.Build import cythonize
+except ImportError:  # optional; utils counts text statistics in Python without the extension
+    cythonize = None
+
+# OpenMP lets batch_text_stats count texts in parallel; without it the loop runs serially
+_OPENMP_FLAGS = ["-fopenmp"] if sys.platform.startswith("linux") else []
+
+if cythonize is not None:
+    ext_modules = cythonize(
+        [Extension("utils_fast", ["utils_fast.pyx"],
+                   extra_compile_args=_OPENMP_FLAGS, extra_link_args=_OPENMP_FLAGS)],
+        language_level=3,
+    )
+else:
+    ext_modules = []
 
 with open("README.md", "r", encoding="utf-8") as fh:
     long_description = fh.read()
@@ -13,6 +31,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/ai-compliance-checker",
     packages=find_packages(),
+    ext_modules=ext_modules,
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -29,6 +48,7 @@ setup(
         "streamlit>=1.28.0",
         "openai>=1.3.0",
         "pandas>=2.0.0",
+        "numpy>=1.24.0",
         "plotly>=5.17.0",
         "spacy>=3.7.0",
         "PyPDF2>=3.0.0",
@@ -0,0 +1,114 @@
+import pytest
+
+from compliance_frameworks import ComplianceFrameworks, _MAX_GAP, _bound_gaps
+
+# (framework, rule type, text the rule flags, text its exclusion clears)
+RULE_EXAMPLES = [
+    ('GDPR', 'Missing Consent Mechanism',
+     "We collect your personal data when you sign up.",
+     "We collect your personal data after obtaining consent."),
+    ('GDPR', 'Vague Data Processing Purpose',
+     "We process data for business purposes.",
+     "We process data for business purposes as specific as billing."),
+    ('GDPR', 'Missing Data Retention Policy',
+     "We retain customer data.",
+     "We retain customer data for a limited period."),
+    ('GDPR', 'Missing Subject Rights',
+     "Your personal data is stored on our servers.",
+     "Your personal data is covered by your right to access it."),
+    ('GDPR', 'Unprotected International Transfer',
+     "We transfer data to partners outside the EU.",
+     "We transfer data to partners outside the EU under adequate safeguards."),
+    ('SOC2', 'Weak Access Control',
+     "Employees can access the billing system.",
+     "Employees can access the billing system after multi-factor authentication."),
+    ('SOC2', 'Unencrypted Data Storage',
+     "We store customer data in the cloud.",
+     "We store customer data in the cloud and encrypt it at rest."),
+    ('SOC2', 'Missing Backup Strategy',
+     "The ledger holds critical data.",
+     "The ledger holds critical data with nightly backup."),
+    ('SOC2', 'Missing Input Validation',
+     "The form accepts user input.",
+     "The form accepts user input and we validate every field."),
+    ('HIPAA', 'Unsecured PHI',
+     "Clinicians view medical records daily.",
+     "Clinicians view medical records through a secure portal."),
+    ('HIPAA', 'Missing Business Associate Agreement',
+     "We share health information with a vendor.",
+     "We share health information with a vendor under an agreement."),
+    ('HIPAA', 'Weak PHI Access Control',
+     "Staff may access PHI from any device.",
+     "Staff may access PHI based on role."),
+    ('HIPAA', 'Missing Breach Procedures',
+     "A security incident may occur.",
+     "A security incident triggers a notification."),
+    ('RBI', 'Non-compliant Data Storage',
+     "Payment data is stored on foreign servers.",
+     "Payment data is stored only in India."),
+    ('RBI', 'Cross-border Data Transfer',
+     "We transfer payment data overseas.",
+     None),
+    ('RBI', 'Missing Cybersecurity Framework',
+     "Our financial system runs on shared servers.",
+     "Our financial system follows a cybersecurity framework."),
+    ('RBI', 'Inadequate KYC Process',
+     "Customer onboarding is done online.",
+     "Customer onboarding is done online after KYC checks."),
+]
+
+frameworks = ComplianceFrameworks()
+
+
+def _rule(framework, rule_type):
+    for category in frameworks.get_framework_rules(framework).values():
+        for pattern_info in category['patterns']:
+            if pattern_info['type'] == rule_type:
+                return pattern_info
+    raise LookupError(rule_type)
+
+
+def _match_count(text, pattern_info):
+    counts = {
+        len(frameworks.find_pattern_matches(text, pattern_info)),
+        len(frameworks.find_pattern_matches(frameworks.prepare(text), pattern_info)),
+    }
+    assert len(counts) == 1, "raw and prepared text disagree"
+    return counts.pop()
+
+
+def test_every_rule_has_an_example():
+    rule_types = {
+        (framework, pattern_info['type'])
+        for framework, categories in frameworks.frameworks.items()
+        for category in categories.values()
+        for pattern_info in category['patterns']
+    }
+    assert rule_types == {(framework, rule_type) for framework, rule_type, _, _ in RULE_EXAMPLES}
+
+
+@pytest.mark.parametrize('framework, rule_type, flagged, excluded', RULE_EXAMPLES)
+def test_rule_matches_intended_example(framework, rule_type, flagged, excluded):
+    pattern_info = _rule(framework, rule_type)
+    assert _match_count(flagged, pattern_info) > 0
+    if excluded is not None:
+        assert _match_count(excluded, pattern_info) == 0
+
+
+@pytest.mark.parametrize('framework, rule_type, flagged, excluded', RULE_EXAMPLES)
+def test_rule_gap_is_bounded(framework, rule_type, flagged, excluded):
+    # Spreading the words wider than a gap may span leaves nothing to match
+    spread = flagged.replace(' ', ' ' * (_MAX_GAP + 1))
+    assert _match_count(spread, _rule(framework, rule_type)) == 0
+
+
+@pytest.mark.parametrize('pattern, bounded', [
+    (r'a.*b', r'a[^\n]{0,%d}b' % _MAX_GAP),
+    (r'a.*?b', r'a[^\n]{0,%d}?b' % _MAX_GAP),
+    (r'a\.*b', r'a\.*b'),
+    (r'[.*]b', r'[.*]b'),
+    (r'[].*]b', r'[].*]b'),
+    (r'[\].*]b.*c', r'[\].*]b[^\n]{0,%d}c' % _MAX_GAP),
+])
+def test_bound_gaps_rewrites_only_gap_tokens(pattern, bounded):
+    assert _bound_gaps(pattern) == bounded
@@ -0,0 +1,32 @@
+from utils import extract_contact_info, sanitize_filename
+
+
+def test_address_names_containing_street_suffixes():
+    text = "12 Forest Lane, 45 Hillcrest Avenue, 99 Stanford Road, 7 Oxford Street"
+    assert extract_contact_info(text)['addresses'] == [
+        '12 Forest Lane', '45 Hillcrest Avenue', '99 Stanford Road', '7 Oxford Street'
+    ]
+
+
+def test_address_suffix_inside_word_is_not_matched():
+    assert extract_contact_info("Flat 1 Hillcrest, Bristol")['addresses'] == []
+
+
+def test_phone_with_unseparated_country_code():
+    assert extract_contact_info("Call +15551234567 now.")['phones'] == ['+1']
+
+
+def test_phone_not_matched_inside_longer_digit_run():
+    assert extract_contact_info("Card 4111111111111111 on file")['phones'] == []
+    assert extract_contact_info("Call (555) 123-4567 or 555.123.4567")['phones'] == ['', '']
+
+
+def test_sanitize_filename_limits_utf8_bytes():
+    sanitized = sanitize_filename('é' * 200 + '.txt')
+    assert sanitized.endswith('.txt')
+    assert len(sanitized.encode('utf-8')) <= 255
+
+
+def test_sanitize_filename_cuts_oversized_extension():
+    sanitized = sanitize_filename('x.' + 'y' * 300)
+    assert sanitized == 'x.' + 'y' * 253
@@ -1,6 +1,164 @@
+import html
 import re
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import math
+import os
+import sys
+import threading
+import numpy as np
+
+try:
+    import re2
+except ImportError:  # optional; contact and date patterns run on the standard library engine without it
+    re2 = None
+
+try:
+    import hyperscan
+except ImportError:  # optional; RE2's set matcher prefilters the contact and date patterns without it
+    hyperscan = None
+
+try:
+    import utils_fast
+except ImportError:  # optional compiled extension; text statistics are counted in Python without it
+    utils_fast = None
+
+def _compile(pattern: str, ignore_case: bool = False):
+    """Compile a scan pattern, preferring RE2's linear-time engine."""
+    if re2 is not None:
+        try:
+            return re2.compile('(?i)' + pattern if ignore_case else pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+_EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+
+# Numbers are fenced at both ends so scans fail fast inside longer digit runs; the
+# leading fence sits before the '+CC' country code when there is one
+_PHONE_PATTERN = r'(?:\B(\+\d{1,3}[-.\s]?)\(?|\(?\b)\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b'
+
+# Simple address pattern (very basic)
+_ADDRESS_PATTERN = (
+    r'\b\d+\s+[A-Za-z\s]+?\b(?:Street|St|Avenue|Ave|Road|Rd|Lane|Ln|Drive|Dr|Boulevard|Blvd)\b'
+)
+
+_DATE_PATTERNS = [
+    r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',  # MM/DD/YYYY or DD/MM/YYYY
+    r'\b\d{2,4}[/-]\d{1,2}[/-]\d{1,2}\b',  # YYYY/MM/DD
+    r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}\b',  # Month DD, YYYY
+    r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}\b'  # DD Month YYYY
+]
+
+_RE_EMAIL = _compile(_EMAIL_PATTERN)
+_RE_PHONE = _compile(_PHONE_PATTERN)
+_RE_ADDRESS = _compile(_ADDRESS_PATTERN, ignore_case=True)
+_RE_DATES = tuple(_compile(pattern, ignore_case=True) for pattern in _DATE_PATTERNS)
+
+# Every contact and date pattern with whether it ignores case. A pattern's index is its
+# id in the prefilters that report which patterns occur anywhere in a text
+_SCAN_PATTERNS = [(_EMAIL_PATTERN, False), (_PHONE_PATTERN, False), (_ADDRESS_PATTERN, True)]
+_SCAN_PATTERNS += [(pattern, True) for pattern in _DATE_PATTERNS]
+_EMAIL_ID, _PHONE_ID, _ADDRESS_ID = 0, 1, 2
+_DATE_IDS = range(3, len(_SCAN_PATTERNS))
+
+def _build_scan_set():
+    """Build an RE2 set reporting which scan patterns occur in a text, or None without RE2."""
+    if re2 is None:
+        return None
+    try:
+        scan_set = re2.Set.SearchSet(re2.Options())
+        for pattern, ignore_case in _SCAN_PATTERNS:
+            scan_set.Add('(?i)' + pattern if ignore_case else pattern)
+        scan_set.Compile()
+    except re2.error:
+        return None
+    return scan_set
+
+def _build_scan_database():
+    """
+    Compile the scan patterns into one Hyperscan database, or None when it cannot be used.
+    
+    Hyperscan's character classes are ASCII-only. On ASCII text they agree with
+    RE2's, but not with the standard library's Unicode classes, so the database
+    is only built when the patterns themselves run on RE2.
+    """
+    if hyperscan is None or re2 is None:
+        return None
+    
+    flags = [
+        hyperscan.HS_FLAG_SINGLEMATCH | (hyperscan.HS_FLAG_CASELESS if ignore_case else 0)
+        for _, ignore_case in _SCAN_PATTERNS
+    ]
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            expressions=[pattern.encode('ascii') for pattern, _ in _SCAN_PATTERNS],
+            ids=list(range(len(_SCAN_PATTERNS))),
+            elements=len(_SCAN_PATTERNS),
+            flags=flags
+        )
+    except hyperscan.error:
+        return None
+    return database
+
+_SCAN_SET = _build_scan_set()
+_SCAN_DATABASE = _build_scan_database()
+
+# Hyperscan scratch space serves one scan at a time, so each thread keeps its own
+_scan_scratch = threading.local()
+
+# Violation severities mapped to indexes into _SEVERITY_DEDUCTIONS
+_SEVERITY_CODES = {'high': 0, 'medium': 1, 'low': 2}
+_OTHER_SEVERITY = 3
+
+# Common casings precomputed so most severities are coded without calling lower()
+_SEVERITY_CODE_VARIANTS = {
+    variant: code
+    for name, code in _SEVERITY_CODES.items()
+    for variant in (name, name.upper(), name.capitalize())
+}
+
+# Score deducted per violation of each severity code
+_SEVERITY_DEDUCTIONS = np.array([15, 8, 3, 0])
+
+# PII types that cost the most when detected with high confidence. Interned, like
+# the labels PIIDetector reports, so membership tests usually match by identity
+_HIGH_RISK_PII = frozenset(map(sys.intern, ('SSN', 'CREDIT_CARD', 'PASSPORT', 'DRIVER_LICENSE')))
+
+_RE_DIGIT = re.compile(r'\d')
+
+# Distinct texts whose extraction and metric results are kept for repeated calls
+_TEXT_CACHE_SIZE = 32
+
+# C0/C1 control characters deleted by normalize_text, and curly quotes mapped to ASCII.
+# Controls that count as whitespace are left for the whitespace collapse instead
+_NORMALIZE_TABLE = str.maketrans({
+    **{chr(code): None
+       for code in [*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20), *range(0x7f, 0xa0)]
+       if not chr(code).isspace()},
+    '\u201c': '"', '\u201d': '"', '\u2018': "'", '\u2019': "'"
+})
+
+# Emoji shown for each lower-case severity level, and for anything else
+_SEVERITY_EMOJI = {
+    'high': '🔴',
+    'medium': '🟡',
+    'low': '🟢',
+    'critical': '🔴',
+    'warning': '🟡',
+    'info': '🔵'
+}
+_DEFAULT_SEVERITY_EMOJI = '⚪'
+
+# Flesch-like weight per character of average word length (84.6 per five characters)
+_WORD_LENGTH_WEIGHT = 84.6 / 5
+
+_RE_SENTENCE_END = re.compile(r'[.!?]+')
+_RE_BAD_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+# Longest filename most filesystems accept, in UTF-8 bytes
+_MAX_FILENAME_BYTES = 255
 
 def chunk_text(text: str, max_length: int = 3000, overlap: int = 200) -> List[str]:
     """
@@ -14,43 +172,62 @@ def chunk_text(text: str, max_length: int = 3000, overlap: int = 200) -> List[st
     Returns:
         List of text chunks
     """
+    return list(iter_chunks(text, max_length, overlap))
+
+def iter_chunks(text: str, max_length: int = 3000, overlap: int = 200) -> Iterator[str]:
+    """
+    Yield overlapping chunks of text one at a time.
+    
+    Produces the same chunks as chunk_text, but lets consumers that handle one
+    chunk at a time avoid holding every chunk of a long document at once.
+    
+    Args:
+        text: Text to chunk
+        max_length: Maximum length of each chunk
+        overlap: Number of characters to overlap between chunks
+        
+    Returns:
+        Iterator over text chunks
+    """
     if len(text) <= max_length:
-        return [text]
+        yield text
+        return
     
-    chunks = []
     start = 0
     
     while start < len(text):
         end = start + max_length
         
-        # If this isn't the last chunk, try to break at a sentence or word boundary
+        # If this isn't the last chunk, try to break at a sentence or word boundary.
+        # Only boundaries past the middle of the chunk are accepted, so the
+        # searches never look at its first half
         if end < len(text):
+            earliest_break = start + max_length // 2 + 1
+            
             # Look for sentence boundary
-            sentence_end = text.rfind('.', start, end)
-            if sentence_end > start + max_length // 2:
+            sentence_end = text.rfind('.', earliest_break, end)
+            if sentence_end != -1:
                 end = sentence_end + 1
             else:
                 # Look for word boundary
-                word_end = text.rfind(' ', start, end)
-                if word_end > start + max_length // 2:
+                word_end = text.rfind(' ', earliest_break, end)
+                if word_end != -1:
                     end = word_end
         
         chunk = text[start:end].strip()
         if chunk:
-            chunks.append(chunk)
+            yield chunk
         
         # Move start position with overlap
         start = max(start + max_length - overlap, end)
-        
-        if start >= len(text):
-            break
-    
-    return chunks
 
 def calculate_compliance_score(results: Dict[str, Any]) -> int:
     """
     Calculate overall compliance score based on violations and other factors.
     
+    Violations and PII entities are reduced to small arrays first, so the
+    deductions are summed by numpy rather than item by item.
+    
     Args:
         results: Analysis results dictionary
         
@@ -60,31 +237,36 @@ def calculate_compliance_score(results: Dict[str, Any]) -> int:
     base_score = 100
     
     # Deduct points for violations
-    for framework, violations in results.get('violations', {}).items():
-        for violation in violations:
-            severity = violation.get('severity', 'Medium').lower()
-            
-            if severity == 'high':
-                base_score -= 15
-            elif severity == 'medium':
-                base_score -= 8
-            elif severity == 'low':
-                base_score -= 3
+    severity_codes = [
+        _severity_code(violation.get('severity', 'Medium'))
+        for violations in results.get('violations', {}).values()
+        for violation in violations
+    ]
+    if severity_codes:
+        severity_counts = np.bincount(severity_codes, minlength=len(_SEVERITY_DEDUCTIONS))
+        base_score -= int(severity_counts @ _SEVERITY_DEDUCTIONS)
+        
+        # Later factors only lower the score further and it is clamped at 0
+        if base_score <= 0:
+            return 0
     
     # Deduct points for PII entities (data exposure risk)
     pii_entities = results.get('pii_entities', [])
-    high_risk_pii = ['SSN', 'CREDIT_CARD', 'PASSPORT', 'DRIVER_LICENSE']
-    
-    for entity in pii_entities:
-        entity_type = entity.get('label', '').upper()
-        confidence = entity.get('confidence', 0)
+    if pii_entities:
+        count = len(pii_entities)
+        confidences = np.fromiter(
+            (entity.get('confidence', 0) for entity in pii_entities), dtype=float, count=count
+        )
+        high_risk = np.fromiter(
+            (_is_high_risk_pii(entity.get('label', '')) for entity in pii_entities),
+            dtype=bool, count=count
+        )
         
-        if entity_type in high_risk_pii and confidence > 0.8:
-            base_score -= 10
-        elif confidence > 0.7:
-            base_score -= 5
-        else:
-            base_score -= 2
+        high = high_risk & (confidences > 0.8)
+        medium = ~high & (confidences > 0.7)
+        high_count = int(np.count_nonzero(high))
+        medium_count = int(np.count_nonzero(medium))
+        base_score -= 10 * high_count + 5 * medium_count + 2 * (count - high_count - medium_count)
     
     # Factor in AI risk assessment if available
     ai_insights = results.get('ai_insights', {})
@@ -99,6 +281,17 @@ def calculate_compliance_score(results: Dict[str, Any]) -> int:
     # Ensure score is within valid range
     return max(0, min(100, base_score))
 
+def _severity_code(severity: str) -> int:
+    """Map a violation severity to its index into _SEVERITY_DEDUCTIONS."""
+    code = _SEVERITY_CODE_VARIANTS.get(severity)
+    if code is None:
+        code = _SEVERITY_CODES.get(severity.lower(), _OTHER_SEVERITY)
+    return code
+
+def _is_high_risk_pii(label: str) -> bool:
+    """Check a PII label against _HIGH_RISK_PII, upper-casing it only when it is not found as is."""
+    return label in _HIGH_RISK_PII or label.upper() in _HIGH_RISK_PII
+
 def extract_contact_info(text: str) -> Dict[str, List[str]]:
     """
     Extract contact information from text.
@@ -109,26 +302,55 @@ def extract_contact_info(text: str) -> Dict[str, List[str]]:
     Returns:
         Dictionary with contact information types and found instances
     """
-    contact_info = {
-        'emails': [],
-        'phones': [],
-        'addresses': []
+    emails, phones, addresses = _extract_contacts(text, _candidate_patterns(text))
+    return {
+        'emails': list(emails),
+        'phones': list(phones),
+        'addresses': list(addresses)
     }
-    
-    # Email pattern
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    contact_info['emails'] = re.findall(email_pattern, text)
-    
-    # Phone pattern
-    phone_pattern = r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-    contact_info['phones'] = re.findall(phone_pattern, text)
-    
-    # Simple address pattern (very basic)
-    address_pattern = r'\d+\s+[A-Za-z\s]+(?:Street|St|Avenue|Ave|Road|Rd|Lane|Ln|Drive|Dr|Boulevard|Blvd)\b'
-    contact_info['addresses'] = re.findall(address_pattern, text, re.IGNORECASE)
-    
-    return contact_info
 
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _candidate_patterns(text: str) -> frozenset:
+    """Return the ids of the scan patterns that can match text."""
+    # Emails need an '@'; phone numbers, street addresses and dates need a digit
+    candidates = set()
+    if '@' in text:
+        candidates.add(_EMAIL_ID)
+    if _RE_DIGIT.search(text) is not None:
+        candidates.update((_PHONE_ID, _ADDRESS_ID, *_DATE_IDS))
+    
+    if candidates:
+        present = _present_patterns(text)
+        if present is not None:
+            candidates &= present
+    return frozenset(candidates)
+
+def _present_patterns(text: str) -> Optional[set]:
+    """Return the ids of the scan patterns occurring in text, or None without a prefilter."""
+    if _SCAN_DATABASE is not None and text.isascii():
+        scratch = getattr(_scan_scratch, 'scratch', None)
+        if scratch is None:
+            scratch = _scan_scratch.scratch = hyperscan.Scratch(database=_SCAN_DATABASE)
+        
+        # One vectorized pass; each pattern reports its first match only
+        present = set()
+        _SCAN_DATABASE.scan(text.encode('ascii'), scratch=scratch,
+                            match_event_handler=lambda pattern_id, *_: present.add(pattern_id))
+        return present
+    
+    if _SCAN_SET is not None:
+        return set(_SCAN_SET.Match(text) or ())
+    return None
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _extract_contacts(text: str, candidates: frozenset) -> Tuple[tuple, tuple, tuple]:
+    """Run the contact patterns among candidates, returning emails, phones and addresses."""
+    emails = tuple(_RE_EMAIL.findall(text)) if _EMAIL_ID in candidates else ()
+    phones = tuple(_RE_PHONE.findall(text)) if _PHONE_ID in candidates else ()
+    addresses = tuple(_RE_ADDRESS.findall(text)) if _ADDRESS_ID in candidates else ()
+    return emails, phones, addresses
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
 def normalize_text(text: str) -> str:
     """
     Normalize text for consistent processing.
@@ -139,17 +361,9 @@ def normalize_text(text: str) -> str:
     Returns:
         Normalized text
     """
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Normalize quotes
-    text = text.replace('"', '"').replace('"', '"')
-    text = text.replace(''', "'").replace(''', "'")
-    
-    # Remove control characters
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-    
-    return text.strip()
+    # Remove control characters and normalize quotes in one translate pass, then
+    # collapse whitespace runs to single spaces; split() also drops the ends' whitespace
+    return ' '.join(text.translate(_NORMALIZE_TABLE).split())
 
 def extract_dates(text: str) -> List[str]:
     """
@@ -161,19 +375,42 @@ def extract_dates(text: str) -> List[str]:
     Returns:
         List of found date strings
     """
-    date_patterns = [
-        r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',  # MM/DD/YYYY or DD/MM/YYYY
-        r'\b\d{2,4}[/-]\d{1,2}[/-]\d{1,2}\b',  # YYYY/MM/DD
-        r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}\b',  # Month DD, YYYY
-        r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}\b'  # DD Month YYYY
-    ]
+    return list(_extract_dates(text, _candidate_patterns(text)))
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _extract_dates(text: str, candidates: frozenset) -> tuple:
+    """Run the date patterns among candidates over text."""
+    dates = set()  # Remove duplicates as matches are collected
+    for pattern_id, pattern in zip(_DATE_IDS, _RE_DATES):
+        if pattern_id in candidates:
+            dates.update(pattern.findall(text))
+    
+    return tuple(dates)
+
+def extract_all(text: str) -> Dict[str, List[str]]:
+    """
+    Extract contact information and dates from text in one call.
     
-    dates = []
-    for pattern in date_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        dates.extend(matches)
+    Which patterns can match is worked out once and shared by every category:
+    marker characters rule out patterns first, then Hyperscan or an RE2 set
+    reports in a single pass which of the rest occur at all. Patterns that
+    cannot match are never run over the text.
+    Results for recently seen texts are reused rather than scanned again.
     
-    return list(set(dates))  # Remove duplicates
+    Args:
+        text: Text to analyze
+        
+    Returns:
+        Dictionary with 'emails', 'phones', 'addresses' and 'dates' lists
+    """
+    candidates = _candidate_patterns(text)
+    emails, phones, addresses = _extract_contacts(text, candidates)
+    return {
+        'emails': list(emails),
+        'phones': list(phones),
+        'addresses': list(addresses),
+        'dates': list(_extract_dates(text, candidates))
+    }
 
 def calculate_text_complexity(text: str) -> Dict[str, float]:
     """
@@ -185,17 +422,48 @@ def calculate_text_complexity(text: str) -> Dict[str, float]:
     Returns:
         Dictionary with complexity metrics
     """
+    return dict(_text_complexity(text))
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _text_complexity(text: str) -> Dict[str, float]:
+    """Compute the complexity metrics of text; the result is cached, so callers copy it."""
     if not text:
         return {'readability_score': 0, 'avg_sentence_length': 0, 'avg_word_length': 0}
     
-    # Basic text statistics
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
+    if utils_fast is not None:
+        return _complexity_metrics(*utils_fast.text_stats(text))
+    return _complexity_metrics(*_text_stats(text))
+
+def calculate_text_complexity_batch(texts: List[str]) -> List[Dict[str, float]]:
+    """
+    Calculate text complexity metrics for many texts.
     
-    words = text.split()
-    word_count = len(words)
-    sentence_count = len(sentences)
+    With the compiled utils_fast extension the texts are counted in parallel
+    outside the GIL; otherwise each text is counted in turn.
+    
+    Args:
+        texts: Texts to analyze
+        
+    Returns:
+        List of complexity metric dictionaries, one per text
+    """
+    if utils_fast is not None:
+        counts = utils_fast.batch_text_stats(texts)
+    else:
+        counts = map(_text_stats, texts)
+    return [_complexity_metrics(*text_counts) for text_counts in counts]
+
+def _text_stats(text: str) -> Tuple[int, int, int]:
+    """Count the sentences, words and word characters of text in Python."""
+    # Sentences are the non-blank pieces between terminators, counted through
+    # map() so no stripped copies are kept
+    sentence_count = sum(map(bool, map(str.strip, _RE_SENTENCE_END.split(text))))
     
+    words = text.split()
+    return sentence_count, len(words), sum(map(len, words))
+
+def _complexity_metrics(sentence_count: int, word_count: int, total_chars: int) -> Dict[str, float]:
+    """Derive the complexity metrics from a text's sentence, word and word character counts."""
     if sentence_count == 0:
         return {'readability_score': 0, 'avg_sentence_length': 0, 'avg_word_length': 0}
     
@@ -203,13 +471,15 @@ def calculate_text_complexity(text: str) -> Dict[str, float]:
     avg_sentence_length = word_count / sentence_count
     
     # Average word length
-    total_chars = sum(len(word) for word in words)
     avg_word_length = total_chars / word_count if word_count > 0 else 0
     
-    # Simple readability score (Flesch-like)
+    # Simple readability score (Flesch-like), clamped to 0-100
     # Higher score = easier to read
-    readability_score = 206.835 - (1.015 * avg_sentence_length) - (84.6 * (avg_word_length / 5))
-    readability_score = max(0, min(100, readability_score))
+    readability_score = 206.835 - 1.015 * avg_sentence_length - _WORD_LENGTH_WEIGHT * avg_word_length
+    if readability_score < 0:
+        readability_score = 0
+    elif readability_score > 100:
+        readability_score = 100
     
     return {
         'readability_score': round(readability_score, 2),
@@ -222,6 +492,11 @@ def highlight_text(text: str, highlights: List[Dict[str, int]],
     """
     Add HTML highlighting to text based on position ranges.
     
+    Positions are loaded into numpy arrays, where invalid highlights are dropped,
+    the rest sorted and overlapping ones merged into one span. The text is then
+    walked once from left to right, copying the plain runs and wrapped spans
+    into a list that is joined at the end.
+    
     Args:
         text: Original text
         highlights: List of dicts with 'start' and 'end' positions
@@ -233,23 +508,37 @@ def highlight_text(text: str, highlights: List[Dict[str, int]],
     if not highlights:
         return text
     
-    # Sort highlights by start position (reverse order for easier insertion)
-    highlights = sorted(highlights, key=lambda x: x['start'], reverse=True)
+    count = len(highlights)
+    starts = np.fromiter((highlight['start'] for highlight in highlights), dtype=np.int64, count=count)
+    ends = np.fromiter((highlight['end'] for highlight in highlights), dtype=np.int64, count=count)
     
-    highlighted_text = text
+    # Keep the highlights that fall inside the text, in start order
+    valid = (starts >= 0) & (starts < ends) & (ends <= len(text))
+    starts, ends = starts[valid], ends[valid]
+    if not len(starts):
+        return text
     
-    for highlight in highlights:
-        start = highlight['start']
-        end = highlight['end']
-        
-        if 0 <= start < end <= len(highlighted_text):
-            before = highlighted_text[:start]
-            highlighted = highlighted_text[start:end]
-            after = highlighted_text[end:]
-            
-            highlighted_text = f"{before}<span class='{highlight_class}'>{highlighted}</span>{after}"
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
     
-    return highlighted_text
+    # A highlight opens a new span unless it starts before the spans so far have ended
+    reach = np.maximum.accumulate(ends)
+    opens = np.flatnonzero(np.concatenate(([True], starts[1:] >= reach[:-1])))
+    span_starts = starts[opens].tolist()
+    span_ends = np.maximum.reduceat(ends, opens).tolist()
+    
+    # Tags are built once per call; the class is escaped so it cannot break out of the attribute
+    open_tag = f"<span class='{html.escape(highlight_class)}'>"
+    close_tag = '</span>'
+    parts = []
+    cursor = 0
+    
+    for start, end in zip(span_starts, span_ends):
+        parts += (text[cursor:start], open_tag, text[start:end], close_tag)
+        cursor = end
+    
+    parts.append(text[cursor:])
+    return ''.join(parts)
 
 def format_confidence_score(confidence: float) -> str:
     """
@@ -278,16 +567,21 @@ def sanitize_filename(filename: str) -> str:
         Sanitized filename
     """
     # Remove or replace invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = _RE_BAD_FILENAME_CHARS.sub('_', filename)
     
     # Remove leading/trailing spaces and dots
     filename = filename.strip('. ')
     
-    # Limit length
-    if len(filename) > 255:
-        name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
-        max_name_length = 255 - len(ext) - 1 if ext else 255
-        filename = name[:max_name_length] + ('.' + ext if ext else '')
+    # Limit length in UTF-8 bytes, the unit filesystems cap names in
+    if len(filename.encode('utf-8')) > _MAX_FILENAME_BYTES:
+        name, ext = os.path.splitext(filename)
+        budget = _MAX_FILENAME_BYTES - len(ext.encode('utf-8'))
+        if budget < 0:
+            # The extension alone is over the limit, so the whole name is cut instead
+            name, ext, budget = filename, '', _MAX_FILENAME_BYTES
+        
+        # Ignoring a trailing partial character keeps the cut on a character boundary
+        filename = name.encode('utf-8')[:budget].decode('utf-8', 'ignore') + ext
     
     return filename
 
@@ -301,13 +595,8 @@ def get_severity_emoji(severity: str) -> str:
     Returns:
         Appropriate emoji
     """
-    emoji_map = {
-        'high': '🔴',
-        'medium': '🟡', 
-        'low': '🟢',
-        'critical': '🔴',
-        'warning': '🟡',
-        'info': '🔵'
-    }
-    
-    return emoji_map.get(severity.lower(), '⚪')
+    # Severities usually arrive lower-case already, so lower() is only a fallback
+    emoji = _SEVERITY_EMOJI.get(severity)
+    if emoji is None:
+        emoji = _SEVERITY_EMOJI.get(severity.lower(), _DEFAULT_SEVERITY_EMOJI)
+    return emoji
@@ -0,0 +1,114 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled text statistics for utils.calculate_text_complexity.
+
+Build in place with ``python setup.py build_ext --inplace``; utils counts the
+same statistics in Python when this extension is not built.
+"""
+from cython.parallel cimport prange
+from libc.stdlib cimport malloc, free
+
+cdef extern from "Python.h":
+    unsigned int PyUnicode_KIND(object text)
+    void *PyUnicode_DATA(object text)
+    Py_ssize_t PyUnicode_GET_LENGTH(object text)
+    Py_UCS4 PyUnicode_READ(unsigned int kind, void *data, Py_ssize_t index) nogil
+    bint Py_UNICODE_ISSPACE(Py_UCS4 ch) nogil
+
+ctypedef struct TextStats:
+    Py_ssize_t sentences
+    Py_ssize_t words
+    Py_ssize_t word_chars
+
+cdef void _count_text(unsigned int kind, void *data, Py_ssize_t length,
+                      TextStats *stats) noexcept nogil:
+    """Count sentences, words and word characters of one string's code points."""
+    cdef Py_ssize_t index
+    cdef Py_UCS4 ch
+    cdef bint in_word = False
+    cdef bint sentence_has_text = False
+    
+    stats.sentences = 0
+    stats.words = 0
+    stats.word_chars = 0
+    
+    for index in range(length):
+        ch = PyUnicode_READ(kind, data, index)
+        if Py_UNICODE_ISSPACE(ch):
+            in_word = False
+            continue
+        
+        # Words are whitespace-separated runs, so terminators count as word characters
+        stats.word_chars += 1
+        if not in_word:
+            stats.words += 1
+            in_word = True
+        
+        # A sentence is a run between terminators holding something other than whitespace
+        if ch == u'.' or ch == u'!' or ch == u'?':
+            if sentence_has_text:
+                stats.sentences += 1
+            sentence_has_text = False
+        else:
+            sentence_has_text = True
+    
+    if sentence_has_text:
+        stats.sentences += 1
+
+cpdef tuple text_stats(str text):
+    """
+    Count the statistics calculate_text_complexity needs in one pass over text.
+    
+    Args:
+        text: Text to analyze
+        
+    Returns:
+        Tuple of (sentence_count, word_count, word_char_count)
+    """
+    cdef TextStats stats
+    _count_text(PyUnicode_KIND(text), PyUnicode_DATA(text), PyUnicode_GET_LENGTH(text), &stats)
+    return stats.sentences, stats.words, stats.word_chars
+
+def batch_text_stats(texts) -> list:
+    """
+    Count text statistics for many texts, in parallel and without the GIL.
+    
+    Args:
+        texts: Iterable of texts to analyze
+        
+    Returns:
+        List of (sentence_count, word_count, word_char_count) tuples, one per text
+    """
+    # The tuple keeps every string alive while the GIL is released
+    cdef tuple items = tuple(texts)
+    cdef Py_ssize_t count = len(items)
+    cdef Py_ssize_t index
+    cdef unsigned int *kinds = <unsigned int *> malloc(count * sizeof(unsigned int))
+    cdef void **datas = <void **> malloc(count * sizeof(void *))
+    cdef Py_ssize_t *lengths = <Py_ssize_t *> malloc(count * sizeof(Py_ssize_t))
+    cdef TextStats *stats = <TextStats *> malloc(count * sizeof(TextStats))
+    
+    try:
+        if count and (kinds == NULL or datas == NULL or lengths == NULL or stats == NULL):
+            raise MemoryError()
+        
+        for index in range(count):
+            text = items[index]
+            if not isinstance(text, str):
+                raise TypeError(f"expected str, got {type(text).__name__}")
+            kinds[index] = PyUnicode_KIND(text)
+            datas[index] = PyUnicode_DATA(text)
+            lengths[index] = PyUnicode_GET_LENGTH(text)
+        
+        for index in prange(count, nogil=True, schedule='dynamic'):
+            _count_text(kinds[index], datas[index], lengths[index], &stats[index])
+        
+        return [
+            (stats[index].sentences, stats[index].words, stats[index].word_chars)
+            for index in range(count)
+        ]
+    finally:
+        free(kinds)
+        free(datas)
+        free(lengths)
+        free(stats)